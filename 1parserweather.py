@@ -1,17 +1,111 @@
-import requests  # Для HTTP-запросов к сайту
-from bs4 import BeautifulSoup  # Для парсинга HTML
 import pandas as pd  # Для работы с табличными данными
-from datetime import datetime, timedelta  # Для работы с датами
-import time  # Для пауз между запросами
+from datetime import date, datetime, timedelta  # Для работы с датами
+import asyncio  # Для параллельной загрузки станций
 import sys  # Для управления системными функциями
 import os  # Для работы с файловой системой
+import numpy as np  # Для работы с колонками накопителя
+import json  # Для контрольной точки докачки
+import argparse  # Для параметров командной строки
+
+import httpx  # Асинхронный HTTP-клиент
+
+from weather_columns import ColumnarWeatherBuffer
+from weather_extract import extract_table
+from weather_gaps import find_gap_ranges, gap_ranges_frame, merge_ranges, subtract_ranges
+from weather_pipeline import ParsePool, default_parse_workers
+from weather_stats import station_statistics, write_stats_report
+from weather_stations import (
+    CATALOG_FILE,
+    EMPTY_RANGES_FILE,
+    WATERMARKS_FILE,
+    fetched_watermarks,
+    load_empty_ranges,
+    parse_shard,
+    save_empty_ranges,
+    save_watermarks,
+    schedule,
+    shard_files,
+    shard_path,
+)
+from weather_store import dataset_size, load_partitioned, save_partitioned
+from weather_fetch import (
+    CacheMiss,
+    CircuitOpen,
+    HostRateLimiter,
+    ResilientFetcher,
+    ResponseCache,
+)
+
+BASE_URL = "https://pogoda-service.ru/archive_gsod_res.php"  # Адрес архива погоды
+
+# Настройки параллельной загрузки
+MAX_CONCURRENCY = 4  # Сколько запросов к сайту выполняется одновременно
+REQUESTS_PER_SECOND = 0.5  # Не чаще одного запроса в 2 секунды к одному хосту (вместо time.sleep(2))
+
+# Настройки инкрементального режима
+CHUNK_DAYS = 92  # Длина одной докачиваемой части (примерно квартал)
+CHECKPOINT_FILE = "weather_checkpoint.json"  # Контрольная точка прерванного запуска
+# Дни без данных на странице считаются окончательно пустыми, только если они старше
+# этого срока: последние дни архив может опубликовать позже
+EMPTY_SETTLE_DAYS = 30
+
+CACHE_DIR = ".weather_cache"  # Папка кэша скачанных страниц
+
+# Куда сохранять данные в зависимости от формата
+OUTPUT_FILES = {
+    "csv": "weather_daily_all_cities.csv",
+    "parquet": "weather_daily_parquet",  # папка, разбитая по городу и году
+    "arrow": "weather_daily_arrow",
+}
+
+
+def split_date_range(start, end, chunk_days):
+    """Делит диапазон дат на части не длиннее chunk_days дней"""
+    chunk_start = start
+    while chunk_start <= end:
+        chunk_end = min(chunk_start + timedelta(days=chunk_days - 1), end)
+        yield chunk_start, chunk_end
+        chunk_start = chunk_end + timedelta(days=1)
+
+
+def split_job(job, chunk_days):
+    """Делит задание (город, станция, начало, конец) на задания не длиннее chunk_days дней"""
+    city_name, station_code, start_date, end_date = job
+    start = datetime.strptime(start_date, "%d.%m.%Y").date()
+    end = datetime.strptime(end_date, "%d.%m.%Y").date()
+    return [
+        (city_name, station_code, chunk_start.strftime("%d.%m.%Y"), chunk_end.strftime("%d.%m.%Y"))
+        for chunk_start, chunk_end in split_date_range(start, end, chunk_days)
+    ]
+
+
+def checkpoint_key(job):
+    """Ключ части в контрольной точке: станция и диапазон дат"""
+    _, station_code, start_date, end_date = job
+    return f"{station_code}:{start_date}-{end_date}"
 
 
 class DailyWeatherParser:
-    def __init__(self):
-        """Инициализация парсера погодных данных"""
-        self.base_url = "https://pogoda-service.ru/archive_gsod_res.php"
-        self.daily_data = []  # Храним данные по дням # Список для хранения данных
+    def __init__(self, cache_dir=None, offline=False, engine="fast", base_url=BASE_URL):
+        """Инициализация парсера погодных данных.
+        cache_dir - папка кэша страниц (None - без кэша),
+        offline=True - только воспроизведение из кэша, без обращения к сайту,
+        engine - движок разбора таблицы: "fast" (без DOM) или "bs4" (BeautifulSoup),
+        base_url - адрес архива (например, локальный mock_pogoda_server.py для замеров)"""
+        self.base_url = base_url
+        self.cache = ResponseCache(cache_dir) if cache_dir else None
+        self.offline = offline
+        self.engine = engine
+        # Загрузка страниц: кэш, повторы с задержкой, выключатели, замеры попыток
+        self.fetcher = ResilientFetcher(cache=self.cache, offline=offline)
+        self.failed_jobs = []  # задания без данных: не скачались даже с повторами, нет в кэше, нет таблицы
+        self.stations = {}  # город -> код станции (нужен для докачки пропусков)
+        self.refetch_queue = []  # задания (город, станция, начало, конец) на докачку
+        # Станция -> диапазоны дней, которых нет в архиве (страница скачалась, а дней на ней нет);
+        # gap_jobs их не запрашивает
+        self.empty_ranges = {}
+        self.last_stats = None  # статистика по станциям после последнего сохранения
+        self.daily_data = ColumnarWeatherBuffer()  # Храним данные по дням в типизированных колонках
         self.headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
         }  # Заголовки, чтобы сайт думал, что это браузер(от блокировок/ботов)
@@ -27,144 +121,365 @@ class DailyWeatherParser:
             pass  # "Ничего не делать, просто продолжаем" для обработки ошибок
         return None
 
-    def parse_city_daily_data(
-        self, city_name, station_code, start_date="01.01.2022", end_date="01.01.2025"
-    ): #данные для одного города
-        """Парсит данные для конкретного города по дням"""
-        print(f"📅 Собираю ежедневные данные для {city_name}...")
-
-        # Параметры запроса
-        params = {
+    def build_params(self, station_code, start_date, end_date):
+        """Параметры запроса к архиву для станции и диапазона дат"""
+        return {
             "station": station_code,
             "datepicker_beg": start_date,
             "datepicker_end": end_date,
         }
 
-        try:
-            # Отправляем GET-запрос
-            response = requests.get(
-                self.base_url, params=params, headers=self.headers, timeout=30
-            )  # Передача фильтров, параметров поиска Параметры, которые добавляются к URL после знака ?.
-            response.raise_for_status()  # проверка статуса успещности  вызовет исключение, если HTTP-статус ответа не 200 (ошибка).
-
-            # Парсим HTML
-            soup = BeautifulSoup(response.text, "html.parser")
-
-            # Ищем таблицу с данными
-            table = soup.find("table")
-            if not table:
-                print(f"⚠️ Не найдена таблица с данными для {city_name}")
-                return
-
-            # Получаем все строки таблицы (пропускаем заголовок) tr - строка
-            rows = table.find_all("tr")[1:]  # Пропускаем заголовок
-
-            days_processed = 0#счетчик кол-ва успешно обработанных дней
-
-            for (
-                row
-            ) in (
-                rows
-            ):  # rows — список строк таблицы (теги <tr>),  полученный через table.find_all("tr")[1:]
-                cols = row.find_all("td")
-                if len(cols) >= 1:  # Проверяем, что есть хотя бы дата
-                    try:
-                        # Извлекаем дату (первая колонка)
-                        date_str = cols[0].text.strip()
-                        date_obj = datetime.strptime(
-                            date_str, "%d.%m.%Y"
-                        )  # "%d.%m.%Y" — формат для распознавания день месяц год
-
-                        # Извлекаем данные из всех доступных колонок
-                        max_temp = (
-                            self.parse_float_value(cols[1].text.strip())
-                            if len(cols) > 1
-                            else None
-                        )
-                        min_temp = (
-                            self.parse_float_value(cols[2].text.strip())
-                            if len(cols) > 2
-                            else None
-                        )
-                        avg_temp = (
-                            self.parse_float_value(cols[3].text.strip())
-                            if len(cols) > 3
-                            else None
-                        )
-                        pressure = (
-                            self.parse_float_value(cols[4].text.strip())
-                            if len(cols) > 4
-                            else None
-                        )
-                        wind_speed = (
-                            self.parse_float_value(cols[5].text.strip())
-                            if len(cols) > 5
-                            else None
-                        )
-                        precipitation = (
-                            self.parse_float_value(cols[6].text.strip())
-                            if len(cols) > 6
-                            else None
-                        )
+    def parse_html_page(self, city_name, html):
+        """Разбирает HTML-страницу архива и добавляет дни в daily_data.
+        Возвращает количество обработанных дней или None, если таблицы нет"""
+        # Извлекаем таблицу в колонки выбранным движком (fast / bs4)
+        return self.add_page(city_name, extract_table(html, self.engine))
 
-                        # Добавляем данные в список по дням
-                        self.daily_data.append(
-                            {
-                                "Город": city_name,
-                                "Дата": date_obj.strftime("%Y-%m-%d"), #формат 2024-01-15 перевод в строку
-                                "Год": date_obj.year,
-                                "Месяц": date_obj.month,
-                                "День": date_obj.day,
-                                "Макс_температура": max_temp,
-                                "Мин_температура": min_temp,
-                                "Сред_температура": avg_temp,
-                                "Давление_гПа": pressure,
-                                "Скорость_ветра_мс": wind_speed,
-                                "Осадки_мм": precipitation,
-                            }
-                        )
-                        days_processed += 1
+    def add_page(self, city_name, columns):
+        """Добавляет уже извлеченные колонки страницы в daily_data.
+        Возвращает количество обработанных дней или None, если таблицы нет"""
+        if columns is None:
+            print(f"⚠️ Не найдена таблица с данными для {city_name}")
+            return None
 
-                    except (ValueError, IndexError, AttributeError) as e:
-                        # Если ошибка в дате или других данных, пропускаем строку
-                        continue
+        # Добавляем колонки страницы в накопитель целиком, без словарей по дням
+        return self.daily_data.append_columns(city_name, columns["Дата"], columns)
 
-            print(f"✅ {city_name}: собрано {days_processed} дней")
+    def parse_city_daily_data(
+        self, city_name, station_code, start_date="01.01.2022", end_date="01.01.2025"
+    ): #данные для одного города
+        """Парсит данные для конкретного города по дням.
+        Загрузка - тем же путем, что и для списка городов (parse_cities_async): кэш,
+        повторы с задержкой, выключатели и ограничение частоты запросов"""
+        print(f"📅 Собираю ежедневные данные для {city_name}...")
+        asyncio.run(self.parse_cities_async([(city_name, station_code, start_date, end_date)]))
+
+    async def parse_cities_async(
+        self,
+        cities,
+        max_concurrency=MAX_CONCURRENCY,
+        requests_per_second=REQUESTS_PER_SECOND,
+        on_parsed=None,
+        chunk_days=CHUNK_DAYS,
+        parse_workers=0,
+    ):
+        """Собирает данные для списка городов параллельно.
+        cities - список кортежей (город, код станции, начало, конец).
+        Одновременно выполняется не больше max_concurrency запросов,
+        а к одному хосту - не чаще requests_per_second в секунду (вместо фиксированной паузы).
+        Неудачные запросы повторяются с нарастающей задержкой; если длинный диапазон так и не
+        скачался, он делится на части по chunk_days дней и повторяются только они.
+        parse_workers - число процессов для разбора страниц (0 - разбор в этом же процессе);
+        загрузка и разбор идут одновременно, каждый этап со своим числом исполнителей.
+        on_parsed(задание, строки) вызывается после успешного разбора каждой страницы"""
+        self.fetcher.limiter = HostRateLimiter(requests_per_second)
+        semaphore = asyncio.Semaphore(max_concurrency)  # ограничение числа одновременных запросов
+        # Сколько скачанных страниц может ждать разбора: если разбор не успевает,
+        # загрузка притормаживает, а не копит страницы в памяти
+        backlog = asyncio.Semaphore(max_concurrency + 2 * max(parse_workers, 1))
+        total = len(cities)
+        finished = 0  # счетчик завершенных заданий для вывода прогресса
+
+        async def parse_one(client, job, allow_split=True):
+            nonlocal finished, total
+            city_name, station_code, start_date, end_date = job
+            params = self.build_params(station_code, start_date, end_date)
+            self.stations[city_name] = station_code
+            try:
+                async with backlog:
+                    async with semaphore:
+                        html = await self.fetcher.fetch(client, self.base_url, params, self.headers)
+                    # Место для запроса уже свободно - следующая страница качается, пока эта разбирается
+                    columns = await parse_pool.extract(html)
+                # Запись в накопитель - только здесь, в цикле asyncio (единственный писатель)
+                rows_before = len(self.daily_data)
+                days_processed = self.add_page(city_name, columns)
+                if days_processed is None:
+                    self.failed_jobs.append(job)
+                    status = f"⚠️ {city_name}: таблица не найдена"
+                else:
+                    status = f"✅ {city_name}: собрано {days_processed} дней"
+                    self.note_empty_days(station_code, start_date, end_date, rows_before)
+                    if on_parsed:
+                        # Разбор синхронный, поэтому строки этой страницы идут подряд
+                        on_parsed(job, self.daily_data.to_dataframe(rows_before))
+            except CacheMiss:
+                self.failed_jobs.append(job)
+                status = f"📴 {city_name}: страницы нет в кэше (режим без сети)"
+            except CircuitOpen as e:
+                self.failed_jobs.append(job)
+                status = f"⛔ {city_name}: {e}"
+            except httpx.HTTPError as e:
+                # Делить имеет смысл только временные ошибки (сеть, таймаут, 429, 5xx):
+                # постоянная 4xx повторится и для каждой части
+                retryable = self.fetcher.retry.is_retryable(e)
+                sub_jobs = split_job(job, chunk_days) if allow_split and retryable else [job]
+                if len(sub_jobs) > 1:
+                    # Весь диапазон не скачался - повторяем частями, неудачной будет только часть
+                    total += len(sub_jobs) - 1
+                    print(f"✂️  {city_name}: повторяю по частям ({len(sub_jobs)})")
+                    await asyncio.gather(
+                        *(parse_one(client, sub_job, allow_split=False) for sub_job in sub_jobs)
+                    )
+                    return
+                self.failed_jobs.append(job)
+                status = f"❌ Ошибка при получении данных для {city_name}: {e}" #сетевые ошибки
+            except Exception as e:
+                self.failed_jobs.append(job)
+                status = f"❌ Неожиданная ошибка при обработке {city_name}: {e}"
+            finished += 1
+            print(f"[{finished}/{total}] {status} ({start_date} - {end_date})")
+
+        with ParsePool(parse_workers, self.engine) as parse_pool:
+            async with httpx.AsyncClient(follow_redirects=True) as client:
+                await asyncio.gather(
+                    *(parse_one(client, city) for city in cities)
+                )
 
-        except requests.exceptions.RequestException as e:
-            print(f"❌ Ошибка при получении данных для {city_name}: {e}") #сетевые ошибки(нет инета,сайт недоступен)
-        except Exception as e:
-            print(f"❌ Неожиданная ошибка при обработке {city_name}: {e}") 
+        if self.cache:
+            print(f"🗄️  Кэш страниц: попаданий {self.cache.hits}, промахов {self.cache.misses}")
+        self.fetcher.metrics.summary()
+        if self.failed_jobs:
+            print(f"⚠️  Не удалось получить частей: {len(self.failed_jobs)} (см. parser.failed_jobs)")
+
+    def load_existing_data(self, filename, fmt="csv", cities=None):
+        """Загружает уже собранный файл (или папку Parquet/Arrow) в daily_data.
+        cities - только эти города (None - все). Возвращает количество загруженных записей"""
+        if not os.path.exists(filename):
+            return 0
+
+        if fmt == "csv":
+            df = pd.read_csv(filename, na_values=["None"])
+            if cities is not None:
+                df = df[df["Город"].isin(list(cities))]
+        else:
+            # Части других городов даже не читаются
+            df = load_partitioned(filename, cities=cities, fmt=fmt)
+        self.daily_data.append_frame(df)
+        print(f"📂 Загружено {len(df):,} записей из {filename}")
+        return len(df)
+
+    def load_checkpoint(self, checkpoint_file):
+        """Восстанавливает прерванный запуск: строки уже скачанных частей
+        добавляются в daily_data, возвращается множество готовых частей"""
+        if not os.path.exists(checkpoint_file):
+            return set()
+
+        with open(checkpoint_file, encoding="utf-8") as f:
+            done = set(json.load(f)["done"])
+
+        rows_file = checkpoint_file + ".csv"
+        if os.path.exists(rows_file):
+            self.daily_data.append_frame(pd.read_csv(rows_file, na_values=["None"]))
+
+        print(f"♻️  Продолжаю прерванный запуск: готово частей {len(done)}")
+        return done
+
+    def save_checkpoint(self, checkpoint_file, done, rows):
+        """Дописывает строки готовой части и список готовых частей на диск"""
+        rows_file = checkpoint_file + ".csv"
+        if len(rows):
+            rows.to_csv(
+                rows_file,
+                mode="a",
+                header=not os.path.exists(rows_file),
+                index=False,
+                na_rep="None",
+            )
+
+        # Пишем во временный файл и переименовываем, чтобы не оставить битый JSON
+        tmp_file = checkpoint_file + ".tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump({"done": sorted(done)}, f, ensure_ascii=False)
+        os.replace(tmp_file, checkpoint_file)
+
+    def merge_csv_shards(self, filename=OUTPUT_FILES["csv"]):
+        """Собирает файлы шардов (weather_daily_all_cities.shard2of4.csv ...) в общий
+        CSV, который читают TRAVELL.py и бот. Строки шардов заменяют строки общего файла
+        за те же дни. Запускать, когда все шарды закончили работу.
+        Возвращает количество собранных файлов шардов"""
+        shards = shard_files(filename)
+        if not shards:
+            print(f"⚠️  Нет файлов шардов для {filename}")
+            return 0
+
+        self.daily_data = ColumnarWeatherBuffer()
+        self.load_existing_data(filename)
+        for shard_file in shards:
+            self.load_existing_data(shard_file)
+        if not self.save_daily_to_csv(filename):
+            return 0
+        print(f"🧩 Собрано файлов шардов: {len(shards)}")
+        return len(shards)
+
+    def clear_checkpoint(self, checkpoint_file=CHECKPOINT_FILE):
+        """Удаляет файлы контрольной точки после успешного сохранения"""
+        for path in (checkpoint_file, checkpoint_file + ".csv"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    async def parse_cities_incremental(
+        self,
+        cities,
+        filename="weather_daily_all_cities.csv",
+        chunk_days=CHUNK_DAYS,
+        checkpoint_file=CHECKPOINT_FILE,
+        fmt="csv",
+        seed_file=None,
+        **fetch_options,
+    ):
+        """Докачивает только отсутствующие дни.
+        Читает существующий файл, для каждой станции находит пропущенные диапазоны дат
+        и скачивает их частями по chunk_days дней. Каждая готовая часть сохраняется
+        в контрольную точку, поэтому прерванный запуск продолжается с места остановки.
+        seed_file - CSV, из которого берутся уже собранные дни этих станций, пока файла
+        filename еще нет (первый запуск шарда читает общий файл)"""
+        names = [city_name for city_name, _, _, _ in cities]
+        if fmt != "csv":
+            # Папка Parquet/Arrow общая для всех шардов: читаем и потом перезаписываем
+            # только части своих городов, чужие части не трогаем
+            self.load_existing_data(filename, fmt, cities=names)
+        elif seed_file and not os.path.exists(filename):
+            self.load_existing_data(seed_file, fmt, cities=names)
+        else:
+            self.load_existing_data(filename, fmt)  # CSV перезаписывается целиком
+        done = self.load_checkpoint(checkpoint_file)
+        today = datetime.now().date().toordinal()
+
+        # Ожидаемый период по коду города; для городов вне списка период пустой
+        for city_name, station_code, _, _ in cities:
+            self.stations[city_name] = station_code
+            self.daily_data.city_code(city_name)
+        city_count = len(self.daily_data.city_names)
+        starts = np.ones(city_count, dtype=np.int64)
+        ends = np.zeros(city_count, dtype=np.int64)
+        for city_name, _, start_date, end_date in cities:
+            code = self.daily_data.city_code(city_name)
+            starts[code] = datetime.strptime(start_date, "%d.%m.%Y").date().toordinal()
+            ends[code] = min(  # будущих дней на сайте нет
+                datetime.strptime(end_date, "%d.%m.%Y").date().toordinal(), today
+            )
+
+        columns = self.daily_data.columns()
+        gaps = find_gap_ranges(columns["city"], columns["ordinal"], starts, ends)
+        jobs = [
+            job
+            for job in self.gap_jobs(*gaps, chunk_days=chunk_days)
+            if checkpoint_key(job) not in done
+        ]
+
+        if not jobs:
+            print("✅ Все дни уже есть в файле, скачивать нечего")
+            return
+
+        print(f"🧩 Нужно докачать частей: {len(jobs)}")
+
+        def on_parsed(job, rows):
+            done.add(checkpoint_key(job))
+            self.save_checkpoint(checkpoint_file, done, rows)
+
+        await self.parse_cities_async(jobs, on_parsed=on_parsed, **fetch_options)
+
+    def note_empty_days(self, station_code, start_date, end_date, rows_before):
+        """Запоминает дни диапазона задания, которых нет на скачанной странице
+        (строки страницы - с позиции rows_before накопителя). Последние EMPTY_SETTLE_DAYS
+        дней не запоминаются - их еще могут опубликовать"""
+        start = datetime.strptime(start_date, "%d.%m.%Y").date().toordinal()
+        end = min(
+            datetime.strptime(end_date, "%d.%m.%Y").date().toordinal(),
+            datetime.now().date().toordinal() - EMPTY_SETTLE_DAYS,
+        )
+        ordinal = self.daily_data.columns(rows_before)["ordinal"]
+        if len(ordinal):
+            # Сайт может обрезать страницу по числу строк: дни после последней строки
+            # не проверены (их запросит следующая докачка)
+            end = min(end, int(ordinal.max()))
+        if start > end:
+            return
+        _, empty_start, empty_end = find_gap_ranges(
+            np.zeros(len(ordinal), dtype=np.int64), ordinal, [start], [end]
+        )
+        if len(empty_start):
+            self.empty_ranges[station_code] = merge_ranges(
+                self.empty_ranges.get(station_code, [])
+                + list(zip(empty_start.tolist(), empty_end.tolist()))
+            )
 
-    def check_missing_dates(self):
-        """Проверяет, есть ли пропущенные даты в данных"""
+    def gap_jobs(self, gap_city, gap_start, gap_end, chunk_days=CHUNK_DAYS):
+        """Превращает диапазоны пропусков в задания на скачивание частями по chunk_days дней.
+        Города без известного кода станции пропускаются, дни, которых в архиве нет
+        (empty_ranges), не запрашиваются"""
+        jobs = []
+        for code, range_start, range_end in zip(gap_city, gap_start, gap_end):
+            city_name = self.daily_data.city_names[code]
+            station_code = self.stations.get(city_name)
+            if station_code is None:
+                continue
+            for part_start, part_end in subtract_ranges(
+                int(range_start), int(range_end), self.empty_ranges.get(station_code, [])
+            ):
+                for chunk_start, chunk_end in split_date_range(
+                    date.fromordinal(part_start), date.fromordinal(part_end), chunk_days
+                ):
+                    jobs.append(
+                        (
+                            city_name,
+                            station_code,
+                            chunk_start.strftime("%d.%m.%Y"),
+                            chunk_end.strftime("%d.%m.%Y"),
+                        )
+                    )
+        return jobs
+
+    async def refetch_queued(self, **fetch_options):
+        """Скачивает диапазоны, поставленные в очередь check_missing_dates(queue_refetch=True)"""
+        jobs, self.refetch_queue = self.refetch_queue, []
+        if jobs:
+            print(f"\n🔁 Докачиваю пропуски: частей {len(jobs)}")
+            await self.parse_cities_async(jobs, **fetch_options)
+
+    def check_missing_dates(self, queue_refetch=False, max_ranges_shown=3):
+        """Проверяет, есть ли пропущенные даты в данных.
+        Возвращает таблицу точных диапазонов пропусков (Город, Начало, Конец, Дней).
+        queue_refetch=True - поставить эти диапазоны в очередь на докачку (refetch_queued)"""
         if not self.daily_data: #проверяет пустой ли список
-            return #если что завершает
+            return None #если что завершает
+
+        columns = self.daily_data.columns()
+        gap_city, gap_start, gap_end = find_gap_ranges(columns["city"], columns["ordinal"])
+        gaps = gap_ranges_frame(self.daily_data.city_names, gap_city, gap_start, gap_end)
 
-        # Группируем данные по городам
-        cities_data = {}
-        for record in self.daily_data:
-            city = record["Город"]  # Из каждой записи достаём значение по ключу "Город
-            if city not in cities_data:
-                cities_data[city] = []
-            cities_data[city].append(record["Дата"])
+        # Период и число пропущенных дней по каждому городу - без цикла по записям
+        periods = pd.Series(columns["ordinal"]).groupby(columns["city"]).agg(["min", "max"])
+        missing_days = np.bincount(
+            gap_city, weights=gap_end - gap_start + 1, minlength=len(self.daily_data.city_names)
+        )
+        ranges_by_city = gaps.groupby("Город", sort=False)
 
         print("\n🔍 Проверка пропущенных дат:")
-        for city, dates in cities_data.items(): #Проходим по всем городам и их спискам дат из словаря cities_data
-            dates = sorted(dates)  # Сортируем даты в хронологическом порядке.
-            if dates:
-                first_date = datetime.strptime(dates[0], "%Y-%m-%d")
-                last_date = datetime.strptime(dates[-1], "%Y-%m-%d")
-                expected_days = (last_date - first_date).days + 1
-                actual_days = len(set(dates))  # Уникальные даты
-
-                if expected_days > actual_days:
-                    missing = expected_days - actual_days
-                    print(
-                        f"  {city}: пропущено {missing} дней ({actual_days}/{expected_days})"
-                    )
-                else:
-                    print(f"  {city}: все дни присутствуют ({actual_days} дней)")
+        for code, (first_day, last_day) in periods.iterrows(): #Проходим по всем городам
+            city = self.daily_data.city_names[code]
+            expected_days = int(last_day - first_day) + 1
+            missing = int(missing_days[code])
+            actual_days = expected_days - missing
+
+            if missing:
+                print(
+                    f"  {city}: пропущено {missing} дней ({actual_days}/{expected_days})"
+                )
+                city_ranges = ranges_by_city.get_group(city)
+                for _, gap in city_ranges.head(max_ranges_shown).iterrows():
+                    print(f"     {gap['Начало']} - {gap['Конец']} ({gap['Дней']} дн.)")
+                if len(city_ranges) > max_ranges_shown:
+                    print(f"     ... и еще диапазонов: {len(city_ranges) - max_ranges_shown}")
+            else:
+                print(f"  {city}: все дни присутствуют ({actual_days} дней)")
+
+        if queue_refetch:
+            self.refetch_queue.extend(self.gap_jobs(gap_city, gap_start, gap_end))
+            print(f"📥 В очередь на докачку поставлено частей: {len(self.refetch_queue)}")
+
+        return gaps
 
     def save_daily_to_csv(self, filename="weather_daily_all_cities.csv"):
         """Сохраняет ежедневные данные в CSV файл"""
@@ -173,14 +488,14 @@ class DailyWeatherParser:
             return False
 
         try:
-            # Создаем DataFrame
-            df = pd.DataFrame(self.daily_data)
+            # Создаем DataFrame (метеопараметры - без копирования из накопителя)
+            df = self.daily_data.to_dataframe()
+            # Убираем повторы (при докачке день мог прийти повторно), оставляем свежие
+            df = df.drop_duplicates(["Город", "Дата"], keep="last")
             # Сортируем по городу, дате
             df = df.sort_values(["Город", "Дата"])
-            # Заменяем NaN на "None" для читаемости
-            df = df.fillna("None")
-            # Сохраняем в CSV
-            df.to_csv( filename, index=False)  # сохраняет только ваши данные, без колонки(убирает первую колонку)
+            # Сохраняем в CSV, NaN записываем как "None" для читаемости
+            df.to_csv( filename, index=False, na_rep="None")  # сохраняет только ваши данные, без колонки(убирает первую колонку)
 
             # Проверяем, что файл создан
             if os.path.exists(filename):
@@ -189,23 +504,14 @@ class DailyWeatherParser:
                 print(f"📊 Размер файла: {file_size:,} байт")
                 print(f"📈 Всего записей: {len(df):,}")
 
-                # Статистика по городам
-                print("\n📊 Статистика по городам:")
-                for city in df["Город"].unique():
-                    city_data = df[df["Город"] == city]
-                    dates = city_data["Дата"]
-
-                    # Подсчитываем количество None в температуре
-                    none_count = (city_data["Сред_температура"] == "None").sum()
-                    total_count = len(city_data)
-
-                    print(f"  {city}: {total_count} дней, пропусков: {none_count}")
-                    print(f"     Период: {dates.min()} - {dates.max()}")
+                # Статистика по городам (один проход groupby)
+                self.last_stats = station_statistics(df)
+                self.print_station_stats(self.last_stats)
 
                 # Пример данных
                 print("\n📋 Пример данных (первые 3 строки):")
                 print("=" * 100)
-                print(df.head(3).to_string(index=False))
+                print(df.head(3).to_string(index=False, na_rep="None"))
                 print("=" * 100)
 
                 # Информация о структуре файла
@@ -222,20 +528,60 @@ class DailyWeatherParser:
             print(f"❌ Ошибка при создании файла: {e}")
             return False
 
-    def create_summary_report(self):
-        """Создает краткий отчет о данных"""
+    def save_daily_to_parquet(self, root_dir="weather_daily_parquet", fmt="parquet"):
+        """Сохраняет ежедневные данные в папку Parquet (fmt="parquet") или Arrow IPC
+        (fmt="arrow"), разбитую по городу и году. Пропуски сохраняются как null"""
+        if not self.daily_data:
+            print("❌ Нет данных для сохранения")
+            return False
+
+        try:
+            df = self.daily_data.to_dataframe()
+            df = df.drop_duplicates(["Город", "Дата"], keep="last")
+            df = df.sort_values(["Город", "Дата"])
+            save_partitioned(df, root_dir, fmt)
+
+            partitions = df.groupby(["Город", "Год"], observed=True).ngroups
+            print(f"\n✅ Набор данных сохранен: {root_dir} ({fmt})")
+            print(f"📊 Размер: {dataset_size(root_dir):,} байт")
+            print(f"📈 Всего записей: {len(df):,}, частей (город × год): {partitions}")
+
+            self.last_stats = station_statistics(df)
+            self.print_station_stats(self.last_stats)
+            return True
+
+        except Exception as e:
+            print(f"❌ Ошибка при сохранении набора данных: {e}")
+            return False
+
+    def station_stats(self):
+        """Статистика по станциям; берется из последнего сохранения, если оно было"""
+        if self.last_stats is None:
+            self.last_stats = station_statistics(self.daily_data.to_dataframe())
+        return self.last_stats
+
+    def print_station_stats(self, stats):
+        """Печатает статистику по городам"""
+        print("\n📊 Статистика по городам:")
+        for row in stats.itertuples(index=False):
+            print(f"  {row.Город}: {row.Дней} дней, пропусков: {row.Пропусков_Сред_температура}")
+            print(f"     Период: {row.Начало:%Y-%m-%d} - {row.Конец:%Y-%m-%d}")
+
+    def create_summary_report(self, report_file=None):
+        """Создает краткий отчет о данных.
+        report_file - сохранить статистику по станциям в файл (.json или .csv)"""
         if not self.daily_data:
             return
 
-        df = pd.DataFrame(self.daily_data)
+        stats = self.station_stats()
 
         print("\n" + "=" * 60)
         print("📊 СВОДКА ДАННЫХ")
         print("=" * 60)
 
-        total_days = len(df)
-        cities = df["Город"].nunique()
-        date_range = f"{df['Дата'].min()} - {df['Дата'].max()}"# диапазон дат
+        total_days = int(stats["Дней"].sum())
+        cities = len(stats)
+        date_range = f"{stats['Начало'].min():%Y-%m-%d} - {stats['Конец'].max():%Y-%m-%d}"# диапазон дат
 
         print(f"Всего дней: {total_days:,}")
         print(f"Городов: {cities}")
@@ -243,16 +589,13 @@ class DailyWeatherParser:
 
         # Статистика по пропускам
         print("\n📈 Качество данных:")
-        for city in df["Город"].unique():
-            city_df = df[df["Город"] == city] #оставляем только строки для текущего города
-            missing_temp = city_df["Сред_температура"].isna().sum() # Заменяем значения на True/False (NaN→True, число→False)
-            total_city = len(city_df)
-            completeness = (
-                100 * (total_city - missing_temp) / total_city if total_city > 0 else 0
-            )
-
+        for city, completeness in zip(stats["Город"], stats["Полнота_температуры_%"]):
             print(f"  {city}: {completeness:.1f}% полных данных по температуре")
 
+        if report_file:
+            write_stats_report(stats, report_file)
+            print(f"\n💾 Статистика по станциям сохранена в файл '{report_file}'")
+
 
 def create_sample_daily_file():
     """Если сайт недоступен или блокирует запросы, программа создает искусственные данные для демонстрации."""
@@ -331,58 +674,133 @@ def create_sample_daily_file():
     return df
 
 
-def main():
-    """Основная функция - создает файл с ежедневными данными"""
+def main(
+    incremental=False,
+    cache_dir=CACHE_DIR,
+    offline=False,
+    engine="fast",
+    fmt="csv",
+    backfill=False,
+    stats_report=None,
+    metrics_file=None,
+    base_url=BASE_URL,
+    max_concurrency=MAX_CONCURRENCY,
+    parse_workers=0,
+    catalog=CATALOG_FILE,
+    shard=None,
+    max_stations=None,
+):
+    """Основная функция - создает файл с ежедневными данными.
+    incremental=True - докачать только отсутствующие дни к существующему файлу,
+    cache_dir - папка кэша страниц (None - без кэша), offline=True - только из кэша,
+    engine - движок разбора таблицы ("fast" или "bs4"),
+    fmt - формат результата: csv, parquet или arrow,
+    backfill=True - после сбора докачать найденные пропуски,
+    stats_report - файл (.json / .csv) для статистики по станциям,
+    metrics_file - CSV с замерами каждой попытки загрузки,
+    base_url - адрес архива (для локального тестового сервера),
+    max_concurrency - число одновременных запросов, parse_workers - процессов разбора страниц,
+    catalog - каталог станций, shard - своя часть каталога ('2/4'; у каждой части свой
+    файл результата), max_stations - сколько самых давно обновлявшихся станций взять.
+    shard и max_stations - только вместе с incremental: иначе файл результата
+    перезаписался бы данными одной части станций"""
+    if (shard or max_stations) and not incremental:
+        raise ValueError("❌ --shard и --max-stations работают только вместе с --incremental")
+    number, shards = parse_shard(shard) if shard else (0, 1)
+    output = OUTPUT_FILES[fmt]
+    if fmt == "csv":
+        # Папки Parquet/Arrow общие: город - в одном шарде, и шард перезаписывает только
+        # свои части. CSV у каждого шарда свой, общий файл собирает --merge-shards
+        output = shard_path(output, number, shards)
+    checkpoint_file = shard_path(CHECKPOINT_FILE, number, shards)
     print("=" * 70)
     print("СОЗДАНИЕ ФАЙЛА С ЕЖЕДНЕВНЫМИ ПОГОДНЫМИ ДАННЫМИ")
     print("=" * 70)
-    print("📅 Данные будут сохранены в файл: weather_daily_all_cities.csv")
-    print("⚠️  Отсутствующие данные будут отмечены как 'None'")
+    print(f"📅 Данные будут сохранены в: {output}")
+    if fmt == "csv":
+        print("⚠️  Отсутствующие данные будут отмечены как 'None'")
     print("=" * 70)
 
     # Создаем парсер
-    parser = DailyWeatherParser()
-
-    # Города для сбора данных
-    cities_to_parse = [
-        ("Санкт-Петербург", "260630", "01.01.2022", "01.01.2025"),
-        ("Сочи", "371710", "01.01.2022", "01.01.2025"),
-        ("Владивосток", "319600", "01.01.2022", "01.01.2025"),
-        ("Калининград", "267020", "01.01.2022", "01.01.2025"),
-        ("Махачкала", "374720", "01.01.2022", "23.12.2025"),
-    ]
+    parser = DailyWeatherParser(
+        cache_dir=cache_dir, offline=offline, engine=engine, base_url=base_url
+    )
+    parser.empty_ranges = load_empty_ranges(EMPTY_RANGES_FILE)  # из файлов всех шардов
+
+    # Станции для сбора данных: свой шард каталога, самые давно обновлявшиеся - первыми
+    cities_to_parse = schedule(catalog, shard, limit=max_stations)
+    if shard:
+        print(f"🧭 Шард {shard}")
 
     print(f"\n🔄 Собираю данные для {len(cities_to_parse)} городов...")
     print("⏱️  Это может занять несколько минут...\n")
 
-    # Собираем данные для каждого города
-    for city_name, station_code, start_date, end_date in cities_to_parse:
-        parser.parse_city_daily_data(city_name, station_code, start_date, end_date)
-        time.sleep(2)  # Пауза между запросами чтобы не падал
+    # Размеры этапов загрузки и разбора задаются отдельно
+    fetch_options = {"max_concurrency": max_concurrency, "parse_workers": parse_workers}
+    if incremental:
+        # Докачиваем только пропущенные дни
+        asyncio.run(
+            parser.parse_cities_incremental(
+                cities_to_parse, output, checkpoint_file=checkpoint_file, fmt=fmt,
+                seed_file=OUTPUT_FILES["csv"] if fmt == "csv" and shards > 1 else None,
+                **fetch_options,
+            )
+        )
+    else:
+        # Собираем данные для всех городов параллельно (частота запросов ограничена)
+        asyncio.run(parser.parse_cities_async(cities_to_parse, **fetch_options))
 
     # Проверяем пропущенные даты
-    parser.check_missing_dates()
+    parser.check_missing_dates(queue_refetch=backfill)
+    if parser.refetch_queue:
+        asyncio.run(parser.refetch_queued(**fetch_options))
+        parser.check_missing_dates()
+
+    # Пустые дни - свойство архива, а не файла результата: сохраняем их сразу после загрузки
+    empty_ranges = {
+        station_code: parser.empty_ranges[station_code]
+        for _, station_code, _, _ in cities_to_parse
+        if station_code in parser.empty_ranges
+    }
+    if empty_ranges:
+        save_empty_ranges(empty_ranges, shard_path(EMPTY_RANGES_FILE, number, shards))
+
+    if metrics_file:
+        parser.fetcher.metrics.save(metrics_file)
+        print(f"💾 Замеры запросов сохранены в файл '{metrics_file}'")
 
     # Создаем файл
     print("\n" + "=" * 70)
     print("СОЗДАНИЕ ФАЙЛА")
     print("=" * 70)
 
-    success = parser.save_daily_to_csv("weather_daily_all_cities.csv")
+    if fmt == "csv":
+        success = parser.save_daily_to_csv(output)
+    else:
+        success = parser.save_daily_to_parquet(output, fmt)
 
     if success:
-        parser.create_summary_report()
+        if incremental:
+            parser.clear_checkpoint(checkpoint_file)  # Все докачанное уже в файле
+        # Отметки - в файл своего шарда, читаются при планировании из всех
+        save_watermarks(
+            fetched_watermarks(parser, cities_to_parse), shard_path(WATERMARKS_FILE, number, shards)
+        )
+        parser.create_summary_report(stats_report)
 
         print("\n" + "=" * 70)
         print("✅ ФАЙЛ УСПЕШНО СОЗДАН!")
         print("=" * 70)
-        print("📁 Файл: weather_daily_all_cities.csv")
+        print(f"📁 Файл: {output}")
         print("📍 Расположение: в той же папке, где находится программа")
         print("\n📊 Файл содержит:")
         print("  • Данные по дням для 4 городов")
         print("  • Период: 2022-2025 годы")
-        print("  • Отсутствующие данные отмечены как 'None'")
+        print("  • Отсутствующие данные отмечены как 'None'" if fmt == "csv" else "  • Отсутствующие данные хранятся как null")
         print("  • Все метеопараметры: температура, давление, ветер, осадки")
+        if fmt == "csv" and shards > 1:
+            print(f"\n🧩 Когда закончат все шарды, соберите общий файл {OUTPUT_FILES['csv']}:")
+            print("   python 1parserweather.py --merge-shards")
     else:
         print("\n" + "=" * 70)
         print("⚠️  СОЗДАНИЕ ПРИМЕРНОГО ФАЙЛА")
@@ -401,9 +819,115 @@ def main():
 
 
 # Запускаем программу
+def parse_args():
+    """Параметры командной строки"""
+    arg_parser = argparse.ArgumentParser(description="Сбор ежедневных погодных данных")
+    arg_parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="докачать только отсутствующие дни к weather_daily_all_cities.csv",
+    )
+    arg_parser.add_argument(
+        "--cache-dir", default=CACHE_DIR, help="папка кэша скачанных страниц"
+    )
+    arg_parser.add_argument(
+        "--no-cache", action="store_true", help="не использовать кэш страниц"
+    )
+    arg_parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="не обращаться к сайту, разбирать только страницы из кэша",
+    )
+    arg_parser.add_argument(
+        "--engine",
+        choices=["fast", "bs4"],
+        default="fast",
+        help="движок разбора таблицы: fast (без DOM) или bs4 (BeautifulSoup)",
+    )
+    arg_parser.add_argument(
+        "--format",
+        choices=list(OUTPUT_FILES),
+        default="csv",
+        help="формат результата: csv или бинарный parquet/arrow, разбитый по городу и году",
+    )
+    arg_parser.add_argument(
+        "--backfill",
+        action="store_true",
+        help="докачать найденные пропуски внутри собранных периодов",
+    )
+    arg_parser.add_argument(
+        "--stats-report",
+        help="сохранить статистику по станциям в файл (.json или .csv)",
+    )
+    arg_parser.add_argument(
+        "--metrics-file",
+        help="сохранить замеры каждой попытки загрузки в CSV",
+    )
+    arg_parser.add_argument(
+        "--base-url",
+        default=BASE_URL,
+        help="адрес архива (например, локальный mock_pogoda_server.py)",
+    )
+    arg_parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=MAX_CONCURRENCY,
+        help="сколько запросов к сайту выполняется одновременно",
+    )
+    arg_parser.add_argument(
+        "--parse-workers",
+        type=int,
+        nargs="?",
+        const=default_parse_workers(),
+        default=0,
+        help="разбирать страницы в пуле процессов (без числа - по числу ядер)",
+    )
+    arg_parser.add_argument(
+        "--catalog", default=CATALOG_FILE, help="каталог станций (Город, Станция, Начало, Конец)"
+    )
+    arg_parser.add_argument(
+        "--shard",
+        help="обновить только свою часть каталога, например 2/4 (вторая из четырех; вместе с --incremental)",
+    )
+    arg_parser.add_argument(
+        "--max-stations",
+        type=int,
+        help="сколько самых давно обновлявшихся станций взять за запуск (вместе с --incremental)",
+    )
+    arg_parser.add_argument(
+        "--merge-shards",
+        action="store_true",
+        help="собрать CSV всех шардов в weather_daily_all_cities.csv (после --shard) и выйти",
+    )
+    args = arg_parser.parse_args()
+    if (args.shard or args.max_stations) and not args.incremental:
+        # Без докачки файл результата перезаписался бы только выбранными станциями
+        arg_parser.error("--shard и --max-stations работают только вместе с --incremental")
+    return args
+
+
 if __name__ == "__main__":
     try:
-        main()
+        args = parse_args()
+        if args.merge_shards:
+            DailyWeatherParser().merge_csv_shards()
+            sys.exit(0)
+        main(
+            incremental=args.incremental,
+            cache_dir=None if args.no_cache else args.cache_dir,
+            offline=args.offline,
+            engine=args.engine,
+            fmt=args.format,
+            backfill=args.backfill,
+            stats_report=args.stats_report,
+            metrics_file=args.metrics_file,
+            base_url=args.base_url,
+            max_concurrency=args.concurrency,
+            parse_workers=args.parse_workers,
+            catalog=args.catalog,
+            shard=args.shard,
+            max_stations=args.max_stations,
+        )
     except KeyboardInterrupt:
         print("\n\n⏹️  Программа прервана пользователем")
         sys.exit(0)
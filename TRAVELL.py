@@ -1,11 +1,29 @@
+import argparse
+import numpy as np
 import pandas as pd
 from datetime import datetime
+from functools import lru_cache
 
-# Загрузка данных о погоде
-df = pd.read_csv("weather_daily_all_cities.csv")
+from climate_cube import build_climate_cube
+from climatology import Climatology, climatology_settings
+from report_export import CHUNK_ROWS, FORMATS, PREVIEW_ROWS, export_report, print_preview, report_path
+from trip_windows import (
+    DAY_OF_YEAR_MONTH, DAYS_IN_YEAR, DEFAULT_TEMP_RANGE, RAINY_DAY_MM, DailySeries,
+    parse_day_of_year, ranked_starts,
+    scores_by_day_of_year, starts_table, top_windows, window_scores,
+)
+from vacation_rules import load_vacation_rules
+from weather_snapshot import load_or_build
+from weather_store import load_daily
 
-# Преобразование столбца с датой в datetime
-df["Дата"] = pd.to_datetime(df["Дата"]) #преобразует строку с датой в формат datetime для работы с датами
+# Файл с погодой и снимок посчитанных по нему таблиц.
+# Данные загружаются не при импорте, а при первом обращении (get_weather_data)
+WEATHER_FILE = "weather_daily_all_cities.csv"
+SNAPSHOT_FILE = ".weather_snapshot.pkl"
+DAILY_SNAPSHOT_FILE = ".weather_daily_snapshot.pkl"  # Ежедневные ряды для оценки поездок по датам
+CLIMATOLOGY_FILE = ".weather_climatology.pkl"  # Климат по дням года (средние и процентили)
+
+LOOKUP_CACHE_SIZE = 4096  # Сколько последних ответов помнит каждый кэш поиска
 
 # Словарь событий
 events_data = [
@@ -412,307 +430,679 @@ events_data = [
 events_df = pd.DataFrame(events_data)
 
 
+# Уровень комфортности по сезонам: месяцы, пороги температуры и подписи
+# (выше первого порога, выше второго, иначе)
+SEASON_COMFORT = [
+    ((12, 1, 2), -5, -15, ("Достаточно комфортно", "Холодно, но терпимо", "Очень холодно")),
+    ((3, 4, 5), 10, 5, ("Тепло и комфортно", "Прохладно, но приятно", "Прохладно")),
+    ((6, 7, 8), 20, 15, ("Жарко и солнечно", "Тепло и приятно", "Прохладное лето")),
+    ((9, 10, 11), 10, 5, ("Теплая осень", "Прохладная осень", "Холодная осень")),
+]
+
+# Типы отдыха (температура, месяцы, рекомендации) заданы данными в vacation_rules.json
+vacation_rules = load_vacation_rules()
+
+# Общие рекомендации для каждого месяца
+MONTH_RECOMMENDATIONS = {
+    1: "❄️ Зимние развлечения: катки, зимние фестивали",
+    2: "⛸️ Лучшее время для катания на коньках и лыжах",
+    3: "🌸 Начало весны, возможны прохладные дни",
+    4: "🌷 Цветут сады и парки, отличное время для фото",
+    5: "🌳 Идеально для пеших экскурсий и пикников",
+    6: "☀️ Начало летнего сезона, можно совмещать пляж и экскурсии",
+    7: "🏊 Пик лета, лучший месяц для пляжного отдыха",
+    8: "🌻 Тёплые вечера, отлично для открытых концертов и фестивалей",
+    9: "🍂 Бархатный сезон, комфортно для любых видов туризма",
+    10: "🍁 Золотая осень, живописные пейзажи для фотографов",
+    11: "🌧️ Дождливый сезон, лучше планировать indoor-активности",
+    12: "🎄 Новогодняя атмосфера, ярмарки и праздничные мероприятия"
+}
+
+# Рекомендации по одежде: температура выше порога -> совет (ниже всех порогов - последний)
+CLOTHING_ADVICE = [
+    (25, "🩳 Легкая одежда из натуральных тканей, головной убор от солнца, солнцезащитные очки"),
+    (20, "👕 Футболки, шорты, легкая куртка на вечер"),
+    (15, "👚 Демисезонная одежда, ветровка, удобная обувь для ходьбы"),
+    (10, "🧥 Теплая кофта, джинсы, непромокаемая куртка"),
+    (0, "🧣 Теплая куртка, шапка, шарф, перчатки"),
+    (-10, "🧤 Зимняя одежда, термобелье, зимняя обувь"),
+]
+
+COLDEST_CLOTHING = "🥶 Очень теплая одежда, многослойность, ветрозащитная куртка"
+UNKNOWN_CLOTHING = "ℹ️ Уточните погоду перед поездкой"
+
+# Погодные колонки таблицы рекомендаций
+WEATHER_COLUMNS = [
+    "Погодные условия",
+    "Средняя температура (°C)",
+    "Средние осадки (мм)",
+    "Скорость ветра (м/с)",
+    "Солнечных дней (%)",
+]
+
+
+def _round_or_none(value):
+    """Округление до десятых; 0 и отсутствие значения - None"""
+    return round(value, 1) if value else None
+
+
+def _join_nonempty(parts, separator):
+    """Поэлементно склеивает массивы строк через separator, пропуская пустые"""
+    result = parts[0]
+    for part in parts[1:]:
+        result = np.where(
+            (result != "") & (part != ""), result + separator + part, result + part
+        )
+    return result
+
+
+def comfort_labels(months, avg_temp, avg_precip, sunny_percentage):
+    """
+    Уровень комфортности для массивов значений сразу (без цикла по строкам).
+    """
+    months = np.asarray(months)
+    avg_temp = np.asarray(avg_temp, dtype=float)
+    avg_precip = np.asarray(avg_precip, dtype=float)
+    sunny_percentage = np.asarray(sunny_percentage, dtype=float)
+
+    comfort = np.full(len(months), "Нормальные условия", dtype=object)
+    for season_months, warm, mild, labels in SEASON_COMFORT:
+        in_season = np.isin(months, season_months)
+        season_comfort = np.select([avg_temp > warm, avg_temp > mild], labels[:2], labels[2])
+        comfort[in_season] = season_comfort[in_season]
+
+    # Учитываем осадки (> 2 мм - лёгкий дождь, > 5 мм - нужен зонтик) и солнце
+    precip = np.select([avg_precip > 5, avg_precip > 2], [", возможны осадки", ", иногда дожди"], "")
+    sunny = np.select(
+        [sunny_percentage > 70, sunny_percentage < 30], [", много солнца", ", мало солнечных дней"], ""
+    )
+    return comfort + precip.astype(object) + sunny.astype(object)
+
+
+def build_weather_lookup(cube):
+    """
+    Словарь (город, месяц) -> (комфортность, температура, осадки, ветер, % солнечных дней)
+    по климатическому кубу. Считается один раз при загрузке данных.
+    """
+    comfort = comfort_labels(
+        cube.index.get_level_values("Месяц"),
+        cube["Сред_температура"],
+        cube["Осадки_мм"],
+        cube["Солнечных_дней_%"],
+    )
+    return {
+        key: (label, _round_or_none(temp), _round_or_none(precip), _round_or_none(wind), round(sunny, 1))
+        for key, label, temp, precip, wind, sunny in zip(
+            cube.index,
+            comfort,
+            cube["Сред_температура"].tolist(),
+            cube["Осадки_мм"].tolist(),
+            cube["Скорость_ветра_мс"].tolist(),
+            cube["Солнечных_дней_%"].tolist(),
+        )
+    }
+
+
+def build_weather_table(lookup):
+    """
+    Погодные колонки рекомендаций с индексом (Город, Месяц) - для объединения с событиями.
+    """
+    keys = list(lookup)
+    table = pd.DataFrame.from_records(
+        list(lookup.values()),
+        columns=WEATHER_COLUMNS,
+        index=pd.MultiIndex.from_arrays(
+            [[key[0] for key in keys], [key[1] for key in keys]], names=["Город", "Месяц"]
+        ),
+    )
+    # None (нет данных или ровно 0) и NaN дают разные советы по одежде - запоминаем, где был None
+    table["Есть температура"] = [weather[1] is not None for weather in lookup.values()]
+    table[WEATHER_COLUMNS[1:]] = table[WEATHER_COLUMNS[1:]].astype(float)
+    return table
+
+
+# Список месяцев для каждого набора из 12 флагов (бит i - месяц i + 1):
+# строка "6, 7, 8" для любого города берется из таблицы, без цикла по месяцам
+MONTH_LISTS = np.array(
+    [", ".join(str(month + 1) for month in range(12) if bits >> month & 1) for bits in range(1 << 12)],
+    dtype=object,
+)
+
+
+def build_suitability(table):
+    """
+    Матрицы город × месяц (температура, осадки, солнце) и тензор пригодности
+    город × месяц × тип отдыха, посчитанные за один проход по всем городам сразу.
+    """
+    months = np.arange(1, 13)
+
+    def matrix(column, fill=np.nan):
+        return table[column].unstack("Месяц").reindex(columns=months).fillna(fill)
+
+    temp = matrix("Средняя температура (°C)")
+    cities = temp.index
+    temp = temp.to_numpy(dtype=float)
+    has_temp = matrix("Есть температура", False).to_numpy(dtype=bool)
+    precip = matrix("Средние осадки (мм)").to_numpy(dtype=float)
+    wind = matrix("Скорость ветра (м/с)").to_numpy(dtype=float)
+
+    # Пригодность: [город, месяц, тип] - все правила для всех городов одной операцией
+    suitable = vacation_rules.evaluate(temp, months, precip, wind)
+
+    return {
+        "cities": cities,
+        "types": vacation_rules.names,
+        "temp": temp,
+        "has_temp": has_temp,
+        "precip": precip,
+        "sunny": matrix("Солнечных дней (%)").to_numpy(dtype=float),
+        "suitable": suitable,
+        "score": suitable.sum(axis=1) * 10,  # [город, тип]: 10 баллов за каждый подходящий месяц
+    }
+
+
+def _type_slice(vacation_type):
+    """Пригодность всех городов по месяцам для типа отдыха (город × месяц)"""
+    suitability = get_weather_data()["suitability"]
+    types = suitability["types"]
+    if vacation_type not in types:
+        return np.zeros(suitability["temp"].shape, dtype=bool)
+    return suitability["suitable"][:, :, types.index(vacation_type)]
+
+
+def build_weather_data(path=WEATHER_FILE):
+    """
+    Читает файл с погодой и считает производные таблицы: список городов,
+    климатический куб и погоду по (город, месяц).
+    """
+    # Только нужные колонки, город - категория, числа - float32
+    df = load_daily(
+        path, columns=["Город", "Месяц", "Сред_температура", "Осадки_мм", "Скорость_ветра_мс"]
+    )
+    # Средние по городу и месяцу считаем один раз, дальше - только поиск в словаре
+    climate_cube = build_climate_cube(df)
+    weather_lookup = build_weather_lookup(climate_cube)
+    weather_table = build_weather_table(weather_lookup)
+    return {
+        "cities": sorted(df["Город"].unique().tolist()),
+        "climate_cube": climate_cube,
+        "weather_lookup": weather_lookup,
+        "weather_table": weather_table,
+    }
+
+
+_weather_data = None  # Загруженные таблицы (None - еще не загружались)
+_reload_hooks = []  # Что сбросить при перезагрузке данных (кэши поиска)
+
+
+def get_weather_data():
+    """
+    Таблицы с погодой. При первом обращении читаются из снимка
+    (или пересчитываются по файлу, если он изменился), дальше - из памяти.
+    """
+    global _weather_data
+    if _weather_data is None:
+        weather_data = load_or_build(WEATHER_FILE, SNAPSHOT_FILE, build_weather_data)
+        # Тензор пригодности зависит от правил, а не только от файла - его в снимке нет
+        weather_data["suitability"] = build_suitability(weather_data["weather_table"])
+        _weather_data = weather_data
+    return _weather_data
+
+
+def build_daily_series(path=WEATHER_FILE):
+    """
+    Ежедневные ряды городов (дата, температура, осадки) для оценки поездок по датам.
+    """
+    return DailySeries(
+        load_daily(path, columns=["Город", "Дата", "Сред_температура", "Осадки_мм"])
+    )
+
+
+_daily_series = None  # Ежедневные ряды (None - еще не загружались)
+
+
+def get_daily_series():
+    """
+    Ежедневные ряды городов. Нужны только для поиска по датам, поэтому
+    загружаются отдельно от месячных таблиц - при первом обращении.
+    """
+    global _daily_series
+    if _daily_series is None:
+        _daily_series = load_or_build(WEATHER_FILE, DAILY_SNAPSHOT_FILE, build_daily_series)
+    return _daily_series
+
+
+_climatology = None  # Климат по дням года (None - еще не загружался)
+
+
+def get_climatology():
+    """
+    Климат по городам и дням года. Считается один раз по ежедневным рядам
+    и сохраняется в снимок рядом с файлом погоды (пересчитывается и при
+    изменении окна сглаживания, порога дождливого дня или процентилей).
+    """
+    global _climatology
+    if _climatology is None:
+        _climatology = load_or_build(
+            WEATHER_FILE, CLIMATOLOGY_FILE, lambda path: Climatology(get_daily_series()),
+            settings=climatology_settings(),
+        )
+    return _climatology
+
+
+def on_weather_reload(hook):
+    """
+    Регистрирует функцию, которая вызывается при перезагрузке данных.
+    """
+    _reload_hooks.append(hook)
+    return hook
+
+
+def reload_weather_data():
+    """
+    Перечитывает данные (снимок или обновленный файл) и правила типов отдыха
+    и сбрасывает все кэши поиска.
+    """
+    global _weather_data, _daily_series, _climatology, vacation_rules
+    _weather_data = None
+    _daily_series = None
+    _climatology = None
+    vacation_rules = load_vacation_rules()
+    for hook in _reload_hooks:
+        hook()
+    return get_weather_data()
+
+
+def lookup_cache_info():
+    """
+    Попадания, промахи и размер кэшей поиска.
+    """
+    return {
+        "get_weather_comfort_level": get_weather_comfort_level.cache_info(),
+        "analyze_vacation_type": analyze_vacation_type.cache_info(),
+        "get_trip_scores": get_trip_scores.cache_info(),
+        "get_trip_score_matrix": get_trip_score_matrix.cache_info(),
+    }
+
+
+@lru_cache(maxsize=LOOKUP_CACHE_SIZE)
 def get_weather_comfort_level(city, month):
     """
     Определяет уровень комфортности погоды для города в указанный месяц
     на основе исторических данных.
     """
-    # Фильтруем данные по городу и месяцу
-    city_month_data = df[(df["Город"] == city) & (df["Месяц"] == month)]
+    month_weather = get_weather_data()["weather_lookup"].get((city, month))
 
-    if city_month_data.empty:
+    if month_weather is None:
         return "Недостаточно данных о погоде", None, None, None, None
 
-    # Рассчитываем средние показатели
-    avg_temp = city_month_data["Сред_температура"].mean()
-    avg_precip = city_month_data["Осадки_мм"].mean()
-    avg_wind = city_month_data["Скорость_ветра_мс"].mean()
+    return month_weather
 
-    # Рассчитываем количество солнечных дней
-    sunny_days = city_month_data[city_month_data["Сред_температура"] > 15].shape[0]  # количество строк
-    total_days = city_month_data.shape[0]
-    sunny_percentage = (sunny_days / total_days * 100) if total_days > 0 else 0
 
-    # Определяем уровень комфортности
-    if avg_temp is None:
-        return "Недостаточно данных о погоде", None, None, None, None
+def vacation_labels(months, avg_temp, avg_precip=None, avg_wind=None):
+    """
+    Типы отдыха и рекомендации для массивов месяцев и температур сразу.
+    Температура NaN - нет данных.
+    """
+    months = np.asarray(months)
+    avg_temp = np.asarray(avg_temp, dtype=float)
 
-    # Для зимних месяцев
-    if month in [12, 1, 2]:
-        if avg_temp > -5:
-            comfort = "Достаточно комфортно"
-        elif avg_temp > -15:
-            comfort = "Холодно, но терпимо"
-        else:
-            comfort = "Очень холодно"
-
-    # Для весенних месяцев
-    elif month in [3, 4, 5]:
-        if avg_temp > 10:
-            comfort = "Тепло и комфортно"
-        elif avg_temp > 5:
-            comfort = "Прохладно, но приятно"
-        else:
-            comfort = "Прохладно"
-
-    # Для летних месяцев
-    elif month in [6, 7, 8]:
-        if avg_temp > 20:
-            comfort = "Жарко и солнечно"
-        elif avg_temp > 15:
-            comfort = "Тепло и приятно"
-        else:
-            comfort = "Прохладное лето"
-
-    # Для осенних месяцев
-    elif month in [9, 10, 11]:
-        if avg_temp > 10:
-            comfort = "Теплая осень"
-        elif avg_temp > 5:
-            comfort = "Прохладная осень"
-        else:
-            comfort = "Холодная осень"
-
-    else:
-        comfort = "Нормальные условия"
-
-    # Учитываем осадки
-    if avg_precip and avg_precip > 5:  # проверяем, что значение не None/False
-        comfort += ", возможны осадки"
-    elif avg_precip and avg_precip > 2:
-        comfort += ", иногда дожди"
-
-
-
-        #avg_precip = 0.5  # → не добавляем ничего (мало осадков)
-        #vg_precip = 3    # → добавляем ", иногда дожди" (2-5 мм)
-       #avg_precip = 8    # → добавляем ", возможны осадки" (>5 мм)
-       #avg_precip = None # → не добавляем (нет данных)
-       
-       #> 2 мм — лёгкий дождь, зонтик не обязателен
-        #> 5 мм — умеренный дождь, нужен зонтик/дождевик
-
-    # Учитываем солнце
-    if sunny_percentage > 70:
-        comfort += ", много солнца"
-    elif sunny_percentage < 30:
-        comfort += ", мало солнечных дней"
-
-    return (
-        comfort,
-        round(avg_temp, 1) if avg_temp else None,
-        round(avg_precip, 1) if avg_precip else None,
-        round(avg_wind, 1) if avg_wind else None,
-        round(sunny_percentage, 1)
+    # Подходит первый тип из списка правил, условия которого выполнены
+    matches = vacation_rules.evaluate(avg_temp, months, avg_precip, avg_wind)
+    conditions = [matches[:, index] for index in range(len(vacation_rules))]
+    vacation_type = np.select(conditions, vacation_rules.names, vacation_rules.default_name)
+    type_recommendation = np.select(
+        conditions, [rule["recommendation"] for rule in vacation_rules.types], ""
+    )
+
+    # Предупреждения о слишком жаркой или холодной погоде
+    warning = np.select(
+        [avg_temp > 32, avg_temp < -10],
+        ["⚠️ Слишком жарко для активного отдыха днём.", "⚠️ Очень холодно, нужна специальная экипировка."],
+        "",
+    )
+
+    # Если нет подходящих типов отдыха по температуре, предлагаем альтернативы
+    no_type = ~matches.any(axis=1)
+    alternative = np.select(
+        [no_type & (avg_temp > 15), no_type & (avg_temp < 5)],
+        [
+            "🌤️ Можно рассмотреть прогулки в парках и лёгкий экскурсионный отдых.",
+            "🧥 Подходящее время для посещения музеев, театров и закрытых аттракционов.",
+        ],
+        "",
     )
 
+    month_recommendation = pd.Series(months).map(MONTH_RECOMMENDATIONS).fillna("").to_numpy()
+    parts = [type_recommendation, warning, alternative, month_recommendation]
+    recommendations = _join_nonempty([part.astype(object) for part in parts], "; ")
+    return vacation_type.astype(object), recommendations
 
-def analyze_vacation_type(city, month, avg_temp):
+
+@lru_cache(maxsize=LOOKUP_CACHE_SIZE)
+def analyze_vacation_type(city, month):
     """
-    Анализирует подходящий тип отдыха на основе температуры и месяца.
+    Анализирует подходящий тип отдыха в городе в указанный месяц по средним
+    температуре, осадкам и ветру из исторических данных (нет данных - NaN).
     """
-    vacation_types = []
-    recommendations = []
-    
-    # Определение типов отдыха по температуре
-    if avg_temp is not None:
-        # 🏖️ Пляжный отдых
-        if 20 <= avg_temp <= 32 and month in [6, 7, 8]:
-            vacation_types.append("🏖️ Пляжный")
-            recommendations.append(
-                "Отличные условия для пляжного отдыха! Можно загорать и купаться."
-            )
-        
-        # 🏛️ Экскурсионный отдых
-        elif 10 <= avg_temp <= 25 and month in [5, 6, 9]:
-            vacation_types.append("🏛️ Экскурсионный")
-            recommendations.append(
-                "Идеальная погода для осмотра достопримечательностей и прогулок."
-            )
-        
-        # ⛷️ Горнолыжный отдых
-        elif -10 <= avg_temp <= -2 and month in [12, 1, 2]:
-            vacation_types.append("⛷️ Горнолыжный")
-            recommendations.append(
-                "Подходящие условия для зимних видов спорта и катания на лыжах."
-            )
-        
-        # 🏙️ Городской туризм
-        elif 5 <= avg_temp <= 25 and month in [4, 5, 6, 9, 10]:
-            vacation_types.append("🏙️ Городской туризм")
-            recommendations.append(
-                "Отличная погода для знакомства с городом, посещения музеев и кафе."
-            )
-        
-        # Проверяем другие возможные варианты
-        if avg_temp > 32:
-            recommendations.append("⚠️ Слишком жарко для активного отдыха днём.")
-        elif avg_temp < -10:
-            recommendations.append("⚠️ Очень холодно, нужна специальная экипировка.")
-    
-    # Если нет подходящих типов отдыха по температуре, предлагаем альтернативы
-    if not vacation_types and avg_temp is not None:
-        if avg_temp > 15:
-            recommendations.append(
-                "🌤️ Можно рассмотреть прогулки в парках и лёгкий экскурсионный отдых."
-            )
-        elif avg_temp < 5:
-            recommendations.append(
-                "🧥 Подходящее время для посещения музеев, театров и закрытых аттракционов."
-            )
-    
-    # Для каждого месяца добавляем общие рекомендации
-    month_recommendations = {
-        1: "❄️ Зимние развлечения: катки, зимние фестивали",
-        2: "⛸️ Лучшее время для катания на коньках и лыжах",
-        3: "🌸 Начало весны, возможны прохладные дни",
-        4: "🌷 Цветут сады и парки, отличное время для фото",
-        5: "🌳 Идеально для пеших экскурсий и пикников",
-        6: "☀️ Начало летнего сезона, можно совмещать пляж и экскурсии",
-        7: "🏊 Пик лета, лучший месяц для пляжного отдыха",
-        8: "🌻 Тёплые вечера, отлично для открытых концертов и фестивалей",
-        9: "🍂 Бархатный сезон, комфортно для любых видов туризма",
-        10: "🍁 Золотая осень, живописные пейзажи для фотографов",
-        11: "🌧️ Дождливый сезон, лучше планировать indoor-активности",
-        12: "🎄 Новогодняя атмосфера, ярмарки и праздничные мероприятия"
-    }
-    
-    if month in month_recommendations:
-        recommendations.append(month_recommendations[month])
-    
-    return ", ".join(vacation_types) if vacation_types else "🎭 Разноплановый", "; ".join(recommendations)
+    _, avg_temp, avg_precip, avg_wind, _ = get_weather_comfort_level(city, month)
+    vacation_type, recommendations = vacation_labels(
+        [month],
+        [np.nan if avg_temp is None else avg_temp],
+        [np.nan if avg_precip is None else avg_precip],
+        [np.nan if avg_wind is None else avg_wind],
+    )
+    return vacation_type[0], recommendations[0]
 
 
-def get_travel_recommendations(city=None, month=None):
+# Ответы зависят от загруженных данных и правил - при перезагрузке кэши сбрасываются
+on_weather_reload(get_weather_comfort_level.cache_clear)
+on_weather_reload(analyze_vacation_type.cache_clear)
+
+
+def get_day_climate(city, day):
     """
-    Генерирует рекомендации для поездок на основе событий и погодных условий.
+    Климат города в день года ('15.07'): средняя температура, процентили
+    (p10 - холодный год, p90 - жаркий), осадки и вероятность дождя.
+    Города и дни могут быть массивами - ответ одной таблицей.
     """
-    recommendations = []
+    return get_climatology().lookup(city, day)
 
-    # Фильтруем события по городу и месяцу, если указаны
-    filtered_events = events_df.copy()
+
+def clothing_advice(avg_temp, has_temp):
+    """
+    Рекомендации по одежде для массива температур; has_temp=False - температура неизвестна.
+    """
+    avg_temp = np.asarray(avg_temp, dtype=float)
+    advice = np.select(
+        [avg_temp > limit for limit, _ in CLOTHING_ADVICE],
+        [text for _, text in CLOTHING_ADVICE],
+        COLDEST_CLOTHING,
+    )
+    return np.where(has_temp, advice, UNKNOWN_CLOTHING).astype(object)
+
+
+def _with_weather_labels(queries):
+    """
+    Добавляет к таблице с колонками Город и Месяц погоду из таблицы (город, месяц),
+    тип отдыха, рекомендации и совет по одежде - для всех строк сразу.
+    """
+    # Погода для всех строк одним объединением с таблицей (город, месяц)
+    recommendations = queries.join(get_weather_data()["weather_table"], on=["Город", "Месяц"])
+    recommendations["Погодные условия"] = recommendations["Погодные условия"].fillna(
+        "Недостаточно данных о погоде"
+    )
+    has_temp = recommendations["Есть температура"].fillna(False).to_numpy(dtype=bool)
+    avg_temp = recommendations["Средняя температура (°C)"].to_numpy(dtype=float)
+    months = recommendations["Месяц"].to_numpy()
+
+    # Тип отдыха и рекомендация по одежде - по температуре и месяцу
+    recommendations["Тип отдыха"], recommendations["Рекомендации по отдыху"] = vacation_labels(
+        months,
+        avg_temp,
+        recommendations["Средние осадки (мм)"].to_numpy(dtype=float),
+        recommendations["Скорость ветра (м/с)"].to_numpy(dtype=float),
+    )
+    recommendations["Рекомендация по одежде"] = clothing_advice(avg_temp, has_temp)
+
+    return recommendations.drop(columns="Есть температура").reset_index(drop=True)
+
+
+def get_recommendations_batch(cities, months):
+    """
+    Рекомендации сразу для многих пар (город, месяц): погодные условия, средние
+    температура, осадки, ветер и солнечные дни, тип отдыха, рекомендации и одежда.
+    cities и months - массивы одной длины (или одно значение для всех пар).
+    Одна таблица, строки - в порядке пар. Месяц вне 1..12 - ValueError.
+    """
+    cities, months = np.broadcast_arrays(
+        np.asarray(cities, dtype=object), np.asarray(months, dtype=np.int64)
+    )
+    if months.size and (months.min() < 1 or months.max() > 12):
+        raise ValueError("❌ Номер месяца должен быть от 1 до 12")
+    queries = pd.DataFrame({"Город": cities.ravel(), "Месяц": months.ravel()})
+    return _with_weather_labels(queries)
+
+
+def _filter_events(city=None, month=None):
+    """
+    События в городе и месяце (None - любые).
+    """
+    filtered_events = events_df
     if city:
         filtered_events = filtered_events[filtered_events["Город"] == city]
     if month:
         filtered_events = filtered_events[filtered_events["Месяц"] == month]
+    return filtered_events
 
-    for _, event in filtered_events.iterrows():
-        # Получаем информацию о погоде
-        comfort_level, avg_temp, avg_precip, avg_wind, sunny_percentage = get_weather_comfort_level(
-            event["Город"], event["Месяц"]
-        )
 
-        # Анализируем тип отдыха
-        vacation_type, vacation_recommendations = analyze_vacation_type(
-            event["Город"], event["Месяц"], avg_temp
-        )
+def get_travel_recommendations(city=None, month=None):
+    """
+    Генерирует рекомендации для поездок на основе событий и погодных условий.
+    """
+    # Фильтруем события по городу и месяцу, если указаны
+    filtered_events = _filter_events(city, month)
 
-        # Формируем рекомендацию
-        recommendation = {
-            "Город": event["Город"],
-            "Месяц": event["Месяц"],
-            "Период/Дата": event["Период/Дата"],
-            "Событие": event["Событие"],
-            "Что происходит": event["Что происходит"],
-            "Погодные условия": comfort_level,
-            "Средняя температура (°C)": avg_temp,
-            "Средние осадки (мм)": avg_precip,
-            "Скорость ветра (м/с)": avg_wind,
-            "Солнечных дней (%)": sunny_percentage,
-            "Тип отдыха": vacation_type,
-            "Рекомендации по отдыху": vacation_recommendations,
-        }
-
-        # Добавляем рекомендацию по одежде на основе температуры
-        if avg_temp is not None:
-            if avg_temp > 25:
-                recommendation["Рекомендация по одежде"] = (
-                    "🩳 Легкая одежда из натуральных тканей, головной убор от солнца, солнцезащитные очки"
-                )
-            elif avg_temp > 20:
-                recommendation["Рекомендация по одежде"] = (
-                    "👕 Футболки, шорты, легкая куртка на вечер"
-                )
-            elif avg_temp > 15:
-                recommendation["Рекомендация по одежде"] = (
-                    "👚 Демисезонная одежда, ветровка, удобная обувь для ходьбы"
-                )
-            elif avg_temp > 10:
-                recommendation["Рекомендация по одежде"] = (
-                    "🧥 Теплая кофта, джинсы, непромокаемая куртка"
-                )
-            elif avg_temp > 0:
-                recommendation["Рекомендация по одежде"] = (
-                    "🧣 Теплая куртка, шапка, шарф, перчатки"
-                )
-            elif avg_temp > -10:
-                recommendation["Рекомендация по одежде"] = (
-                    "🧤 Зимняя одежда, термобелье, зимняя обувь"
-                )
-            else:
-                recommendation["Рекомендация по одежде"] = (
-                    "🥶 Очень теплая одежда, многослойность, ветрозащитная куртка"
-                )
-        else:
-            recommendation["Рекомендация по одежде"] = "ℹ️ Уточните погоду перед поездкой"
+    if filtered_events.empty:
+        return pd.DataFrame()
+
+    return _with_weather_labels(filtered_events)
+
+
+def iter_travel_recommendations(city=None, month=None, chunk_rows=CHUNK_ROWS):
+    """
+    Те же рекомендации, что get_travel_recommendations, но частями по chunk_rows событий -
+    для потоковой выгрузки без полной таблицы в памяти. Без событий - одна пустая
+    часть с колонками отчета (для заголовка файла).
+    """
+    filtered_events = _filter_events(city, month)
+    for start in range(0, max(len(filtered_events), 1), chunk_rows):
+        yield _with_weather_labels(filtered_events.iloc[start:start + chunk_rows])
 
-        recommendations.append(recommendation)
 
-    return pd.DataFrame(recommendations)
+def _best_month_reason(vacation_type):
+    """Почему месяц подходит для типа отдыха (из правил)"""
+    for rule in vacation_rules.types:
+        if rule["name"] == vacation_type:
+            return rule.get("best_month_reason", "")
+    return ""
 
 
 def get_best_months_for_vacation_type(city, vacation_type):
     """
     Определяет лучшие месяцы для конкретного типа отдыха в указанном городе.
     """
-    months_data = []
-    
-    for month in range(1, 13):
-        # Получаем погодные данные для каждого месяца
-        comfort_level, avg_temp, avg_precip, avg_wind, sunny_percentage = get_weather_comfort_level(city, month)
-        
-        if avg_temp is not None:
-            # Проверяем подходит ли месяц для данного типа отдыха
-            suitable = False
-            reason = ""
-            
-            if vacation_type == "🏖️ Пляжный" and 20 <= avg_temp <= 32 and month in [6, 7, 8]:
-                suitable = True
-                reason = "Идеальная температура для купания и загара"
-            elif vacation_type == "🏛️ Экскурсионный" and 10 <= avg_temp <= 25 and month in [5, 6, 9]:
-                suitable = True
-                reason = "Комфортная температура для длительных прогулок"
-            elif vacation_type == "⛷️ Горнолыжный" and -10 <= avg_temp <= -2 and month in [12, 1, 2]:
-                suitable = True
-                reason = "Оптимальные условия для зимних видов спорта"
-            elif vacation_type == "🏙️ Городской туризм" and 5 <= avg_temp <= 25 and month in [4, 5, 6, 9, 10]:
-                suitable = True
-                reason = "Удобно для посещения музеев, ресторанов и шопинга"
-            
-            months_data.append({
-                "Месяц": month,
-                "Средняя температура": avg_temp,
-                "Подходит для": vacation_type,
-                "Рекомендуется": suitable,
-                "Причина": reason if suitable else "Не соответствует температурным критериям",
-                "Осадки (мм)": avg_precip,
-                "Солнечных дней (%)": sunny_percentage
-            })
-    
-    return pd.DataFrame(months_data)
+    suitability = get_weather_data()["suitability"]
+    cities = suitability["cities"]
+    if city not in cities:
+        return pd.DataFrame()
+
+    # Строка города из готовых матриц; месяцы без данных о температуре не показываем
+    row = cities.get_loc(city)
+    months = suitability["has_temp"][row]
+    suitable = _type_slice(vacation_type)[row][months]
+
+    return pd.DataFrame({
+        "Месяц": np.arange(1, 13)[months],
+        "Средняя температура": suitability["temp"][row][months],
+        "Подходит для": vacation_type,
+        "Рекомендуется": suitable,
+        "Причина": np.where(
+            suitable, _best_month_reason(vacation_type), "Не соответствует температурным критериям"
+        ),
+        "Осадки (мм)": suitability["precip"][row][months],
+        "Солнечных дней (%)": suitability["sunny"][row][months],
+    })
+
+
+def compare_cities_for_vacation_type(vacation_type):
+    """
+    Сравнивает все города для типа отдыха: подходящие месяцы, средние условия в них
+    и оценку. Города без подходящих месяцев не включаются.
+    """
+    suitability = get_weather_data()["suitability"]
+    suitable = _type_slice(vacation_type)
+    count = suitable.sum(axis=1)
+    chosen = count > 0
+    suitable, count = suitable[chosen], count[chosen]
+
+    def mean_over_suitable(values):
+        # Среднее по подходящим месяцам без учета пропусков (как Series.mean)
+        values = values[chosen]
+        present = suitable & ~np.isnan(values)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(present, values, 0).sum(axis=1) / present.sum(axis=1)
+
+    month_bits = (suitable * (1 << np.arange(12))).sum(axis=1)
+    comparison_df = pd.DataFrame({
+        "Город": suitability["cities"][chosen],
+        "Рекомендуемые месяцы": MONTH_LISTS[month_bits],
+        "Средняя температура": np.round(mean_over_suitable(suitability["temp"]), 1),
+        "Средние осадки": np.round(mean_over_suitable(suitability["precip"]), 1),
+        "Солнечных дней": np.round(mean_over_suitable(suitability["sunny"]), 1),
+        "Оценка": count * 10,  # Простая оценка
+    })
+    return comparison_df.sort_values("Оценка", ascending=False)
+
+
+def trip_criteria(vacation_type=None):
+    """
+    Какой день считается хорошим для поездки: диапазон средней температуры
+    и максимум осадков. Без типа отдыха (или без ограничения в правиле) -
+    просто комфортная погода.
+    """
+    for rule in vacation_rules.types:
+        if rule["name"] == vacation_type:
+            temp = rule.get("temp")
+            precip = rule.get("precip")
+            return (
+                tuple(temp) if temp else DEFAULT_TEMP_RANGE,
+                precip[1] if precip else RAINY_DAY_MM,
+            )
+    return DEFAULT_TEMP_RANGE, RAINY_DAY_MM
+
+
+def trip_season(vacation_type=None):
+    """
+    В какие дни года можно начинать поездку (массив длиной 366): месяц дня начала -
+    из месяцев правила типа отдыха, как в меню 5 и 6. Без типа отдыха - любой день.
+    """
+    if vacation_type in vacation_rules.names:
+        return vacation_rules.month_mask[DAY_OF_YEAR_MONTH, vacation_rules.names.index(vacation_type)]
+    return np.ones(DAYS_IN_YEAR, dtype=bool)
 
 
-def main():
+def _in_season(scores, vacation_type):
+    """Оценка и худший год вне сезона типа отдыха - 0: такие даты не подходят"""
+    score, worst, mean_temp, mean_precip, years = scores
+    season = trip_season(vacation_type)
+    return np.where(season, score, 0), np.where(season, worst, 0), mean_temp, mean_precip, years
+
+
+@lru_cache(maxsize=LOOKUP_CACHE_SIZE)
+def get_trip_scores(city, days=7, vacation_type=None):
+    """
+    Оценки поездки на days дней для каждого дня года начала (массивы длиной 366):
+    средняя по годам доля хороших дней, худший год, температура, осадки и число лет.
+    Все даты начала за все годы считаются сразу - скользящим окном по ежедневному ряду.
+    Даты начала вне месяцев типа отдыха получают оценку 0.
+    """
+    daily_series = get_daily_series()
+    if city not in daily_series:
+        return None
+    temp_range, max_precip = trip_criteria(vacation_type)
+    windows = window_scores(*daily_series.city(city), days, temp_range, max_precip)
+    scores = tuple(values[0] for values in scores_by_day_of_year(*windows))
+    return _in_season(scores, vacation_type)
+
+
+@lru_cache(maxsize=8)
+def get_trip_score_matrix(days=7, vacation_type=None):
+    """
+    Оценки поездки на days дней сразу для всех городов и дней года начала
+    (матрицы [город, 366], порядок городов - как в get_daily_series().city_names).
+    Считаются одним проходом скользящего окна и переиспользуются для любых запросов.
+    Даты начала вне месяцев типа отдыха получают оценку 0.
+    """
+    daily_series = get_daily_series()
+    temp_range, max_precip = trip_criteria(vacation_type)
+    windows = window_scores(
+        daily_series.ordinal, daily_series.temp, daily_series.precip, days,
+        temp_range, max_precip, offsets=daily_series.offsets,
+    )
+    scores = scores_by_day_of_year(*windows, cities=len(daily_series.city_names))
+    return _in_season(scores, vacation_type)
+
+
+on_weather_reload(get_trip_scores.cache_clear)
+on_weather_reload(get_trip_score_matrix.cache_clear)
+
+
+def get_best_trip_starts(city, days=7, vacation_type=None, top=10):
+    """
+    Лучшие дни начала поездки на days дней в городе (по всем годам данных).
+    Дни с оценкой 0 (ни одного хорошего дня) не показываются.
+    """
+    scores = get_trip_scores(city, days, vacation_type)
+    if scores is None:
+        return pd.DataFrame()
+    return ranked_starts(*scores, days, top=top)
+
+
+def score_trip_start(city, start, days=7, vacation_type=None):
+    """
+    Оценка поездки с конкретного дня ('15.07') на days дней - одна строка таблицы.
+    """
+    scores = get_trip_scores(city, days, vacation_type)
+    if scores is None:
+        return pd.DataFrame()
+    all_starts = ranked_starts(*scores, days, top=None, min_years=1, suitable_only=False)
+    return all_starts[all_starts["День года"] == parse_day_of_year(start) + 1]
+
+
+def find_best_trips(days=7, vacation_type=None, top=10, per_city=None):
+    """
+    Лучшие сочетания города и дня начала поездки на days дней по всему каталогу.
+    top - сколько сочетаний (None - все), per_city - сколько дат одного города
+    можно показать (None - без ограничения). Сочетания с оценкой 0 не показываются.
+    """
+    score, worst, mean_temp, mean_precip, years = get_trip_score_matrix(days, vacation_type)
+    pairs = top_windows(score, worst, years, top=top, per_city=per_city)
+    city, day = np.array(pairs, dtype=np.int64).reshape(-1, 2).T
+    trips_df = starts_table(
+        day, days, score[city, day], worst[city, day], mean_temp[city, day],
+        mean_precip[city, day], years[city, day],
+    )
+    trips_df.insert(0, "Город", np.array(get_daily_series().city_names, dtype=object)[city])
+    return trips_df
+
+
+def choose_vacation_type(title):
+    """
+    Меню выбора типа отдыха (пункты - из правил). Возвращает название или None.
+    """
+    print(title)
+    for number, name in enumerate(vacation_rules.names, 1):
+        print(f"{number}. {name}")
+
+    type_choice = input(f"Ваш выбор (1-{len(vacation_rules)}): ").strip()
+    type_map = {str(number): name for number, name in enumerate(vacation_rules.names, 1)}
+    return type_map.get(type_choice)
+
+
+def main(export_format="csv", preview_rows=PREVIEW_ROWS):
+    """
+    Меню. Отчеты записываются в файлы формата export_format по частям,
+    на экран выводятся первые preview_rows строк.
+    """
     print("=" * 100)
     print("🎯 СИСТЕМА РЕКОМЕНДАЦИЙ ДЛЯ ПУТЕШЕСТВИЙ ПО РОССИИ")
     print("📊 Анализ погоды + события + тип отдыха")
     print("=" * 100)
     
     print("\n🎭 Доступные типы отдыха:")
-    print("🏖️  Пляжный (20-32°C) — июнь-август")
-    print("🏛️  Экскурсионный (10-25°C) — май, июнь, сентябрь")
-    print("⛷️  Горнолыжный (-10...-2°C) — декабрь-февраль")
-    print("🏙️  Городской туризм (5-25°C) — апрель-июнь, сентябрь-октябрь")
+    for line in vacation_rules.describe():
+        print(line)
     print("-" * 50)
 
     while True:
@@ -724,34 +1114,35 @@ def main():
         print("5. Подобрать лучшие месяцы для типа отдыха")
         print("6. Сравнить города для конкретного типа отдыха")
         print("7. Выход")
+        print("8. Подобрать лучшие даты поездки в городе")
+        print("9. Найти лучшие города и даты для поездки")
 
-        choice = input("\n✅ Ваш выбор (1-7): ").strip()
+        choice = input("\n✅ Ваш выбор (1-9): ").strip()
 
         if choice == "1":
             # Все события
-            recommendations = get_travel_recommendations()
-            print(f"\n🎉 Найдено {len(recommendations)} событий:")
-            print(recommendations.to_string(index=False))
-
-            # Сохраняем в файл
-            recommendations.to_csv(
-                "все_рекомендации_для_поездок.csv", index=False, encoding="utf-8"
+            # Сохраняем в файл по частям, на экран - первые строки
+            filename = report_path("все_рекомендации_для_поездок.csv", export_format)
+            report = export_report(
+                iter_travel_recommendations(), filename, export_format, preview_rows
             )
-            print("\n💾 Рекомендации сохранены в файл 'все_рекомендации_для_поездок.csv'")
+            print(f"\n🎉 Найдено {report.rows} событий:")
+            print_preview(report)
+            print(f"\n💾 Рекомендации сохранены в файл '{filename}'")
 
         elif choice == "2":
             # События в конкретном городе
-            print("\n📍 Доступные города:", ", ".join(sorted(df["Город"].unique())))
+            print("\n📍 Доступные города:", ", ".join(get_weather_data()["cities"]))
             city = input("Введите название города: ").strip()
 
-            if city in df["Город"].unique():
-                recommendations = get_travel_recommendations(city=city)
-                print(f"\n🎯 Найдено {len(recommendations)} событий в городе {city}:")
-                print(recommendations.to_string(index=False))
-
-                # Сохраняем в файл
-                filename = f"рекомендации_{city}.csv"
-                recommendations.to_csv(filename, index=False, encoding="utf-8")
+            if city in get_weather_data()["cities"]:
+                # Сохраняем в файл по частям, на экран - первые строки
+                filename = report_path(f"рекомендации_{city}.csv", export_format)
+                report = export_report(
+                    iter_travel_recommendations(city=city), filename, export_format, preview_rows
+                )
+                print(f"\n🎯 Найдено {report.rows} событий в городе {city}:")
+                print_preview(report)
                 print(f"\n💾 Рекомендации сохранены в файл '{filename}'")
             else:
                 print(f"❌ Город '{city}' не найден в базе данных.")
@@ -763,13 +1154,14 @@ def main():
             try:
                 month_num = int(month)
                 if 1 <= month_num <= 12:
-                    recommendations = get_travel_recommendations(month=month_num)
-                    print(f"\n📅 Найдено {len(recommendations)} событий в месяце {month_num}:")
-                    print(recommendations.to_string(index=False))
-
-                    # Сохраняем в файл
-                    filename = f"рекомендации_месяц_{month_num}.csv"
-                    recommendations.to_csv(filename, index=False, encoding="utf-8")
+                    # Сохраняем в файл по частям, на экран - первые строки
+                    filename = report_path(f"рекомендации_месяц_{month_num}.csv", export_format)
+                    report = export_report(
+                        iter_travel_recommendations(month=month_num),
+                        filename, export_format, preview_rows,
+                    )
+                    print(f"\n📅 Найдено {report.rows} событий в месяце {month_num}:")
+                    print_preview(report)
                     print(f"\n💾 Рекомендации сохранены в файл '{filename}'")
                 else:
                     print("⚠️ Номер месяца должен быть от 1 до 12.")
@@ -778,22 +1170,21 @@ def main():
 
         elif choice == "4":
             # События в конкретном городе и месяце
-            print("\n📍 Доступные города:", ", ".join(sorted(df["Город"].unique())))
+            print("\n📍 Доступные города:", ", ".join(get_weather_data()["cities"]))
             city = input("Введите название города: ").strip()
             month = input("Введите номер месяца (1-12): ").strip()
 
             try:
                 month_num = int(month)
-                if city in df["Город"].unique() and 1 <= month_num <= 12:
-                    recommendations = get_travel_recommendations(
-                        city=city, month=month_num
+                if city in get_weather_data()["cities"] and 1 <= month_num <= 12:
+                    # Сохраняем в файл по частям, на экран - первые строки
+                    filename = report_path(f"рекомендации_{city}_месяц_{month_num}.csv", export_format)
+                    report = export_report(
+                        iter_travel_recommendations(city=city, month=month_num),
+                        filename, export_format, preview_rows,
                     )
-                    print(f"\n🎯 Найдено {len(recommendations)} событий в городе {city} в месяце {month_num}:")
-                    print(recommendations.to_string(index=False))
-
-                    # Сохраняем в файл
-                    filename = f"рекомендации_{city}_месяц_{month_num}.csv"
-                    recommendations.to_csv(filename, index=False, encoding="utf-8")
+                    print(f"\n🎯 Найдено {report.rows} событий в городе {city} в месяце {month_num}:")
+                    print_preview(report)
                     print(f"\n💾 Рекомендации сохранены в файл '{filename}'")
                 else:
                     print("⚠️ Проверьте правильность ввода города и месяца.")
@@ -802,26 +1193,12 @@ def main():
 
         elif choice == "5":
             # Подбор лучших месяцев для типа отдыха
-            print("\n📍 Доступные города:", ", ".join(sorted(df["Город"].unique())))
+            print("\n📍 Доступные города:", ", ".join(get_weather_data()["cities"]))
             city = input("Введите название города: ").strip()
             
-            print("\n🎭 Выберите тип отдыха:")
-            print("1. 🏖️ Пляжный")
-            print("2. 🏛️ Экскурсионный")
-            print("3. ⛷️ Горнолыжный")
-            print("4. 🏙️ Городской туризм")
-            
-            type_choice = input("Ваш выбор (1-4): ").strip()
+            vacation_type = choose_vacation_type("\n🎭 Выберите тип отдыха:")
             
-            type_map = {
-                "1": "🏖️ Пляжный",
-                "2": "🏛️ Экскурсионный",
-                "3": "⛷️ Горнолыжный",
-                "4": "🏙️ Городской туризм"
-            }
-            
-            if city in df["Город"].unique() and type_choice in type_map:
-                vacation_type = type_map[type_choice]
+            if city in get_weather_data()["cities"] and vacation_type:
                 months_df = get_best_months_for_vacation_type(city, vacation_type)
                 
                 print(f"\n📊 Лучшие месяцы для {vacation_type} отдыха в {city}:")
@@ -835,76 +1212,115 @@ def main():
                     print(f"\n⚠️ В этом городе нет идеальных месяцев для {vacation_type} отдыха")
                 
                 # Сохраняем в файл
-                filename = f"лучшие_месяцы_{city}_{vacation_type.replace(' ', '_')}.csv"
-                months_df.to_csv(filename, index=False, encoding="utf-8")
+                filename = report_path(
+                    f"лучшие_месяцы_{city}_{vacation_type.replace(' ', '_')}.csv", export_format
+                )
+                export_report([months_df], filename, export_format, preview_rows=0)
                 print(f"\n💾 Результаты сохранены в файл '{filename}'")
             else:
                 print("❌ Проверьте правильность ввода.")
 
         elif choice == "6":
             # Сравнение городов для типа отдыха
-            print("\n🎭 Выберите тип отдыха для сравнения городов:")
-            print("1. 🏖️ Пляжный")
-            print("2. 🏛️ Экскурсионный")
-            print("3. ⛷️ Горнолыжный")
-            print("4. 🏙️ Городской туризм")
+            vacation_type = choose_vacation_type("\n🎭 Выберите тип отдыха для сравнения городов:")
             
-            type_choice = input("Ваш выбор (1-4): ").strip()
-            type_map = {
-                "1": "🏖️ Пляжный",
-                "2": "🏛️ Экскурсионный",
-                "3": "⛷️ Горнолыжный",
-                "4": "🏙️ Городской туризм"
-            }
-            
-            if type_choice in type_map:
-                vacation_type = type_map[type_choice]
+            if vacation_type:
                 
                 print(f"\n📊 Сравнение городов для {vacation_type} отдыха:")
                 print("-" * 80)
                 
-                all_cities_data = []
-                for city in sorted(df["Город"].unique()):
-                    months_df = get_best_months_for_vacation_type(city, vacation_type)
-                    recommended_months = months_df[months_df["Рекомендуется"] == True]
-                    
-                    if not recommended_months.empty:
-                        avg_temp = recommended_months["Средняя температура"].mean()
-                        avg_precip = recommended_months["Осадки (мм)"].mean()
-                        avg_sunny = recommended_months["Солнечных дней (%)"].mean()
-                        
-                        city_data = {
-                            "Город": city,
-                            "Рекомендуемые месяцы": ", ".join(map(str, recommended_months["Месяц"].tolist())),
-                            "Средняя температура": round(avg_temp, 1),
-                            "Средние осадки": round(avg_precip, 1),
-                            "Солнечных дней": round(avg_sunny, 1),
-                            "Оценка": len(recommended_months) * 10  # Простая оценка
-                        }
-                        all_cities_data.append(city_data)
+                # Все города сразу - срез готового тензора пригодности
+                comparison_df = compare_cities_for_vacation_type(vacation_type)
                 
-                if all_cities_data:
-                    comparison_df = pd.DataFrame(all_cities_data)
-                    comparison_df = comparison_df.sort_values("Оценка", ascending=False)
-                    
-                    print(comparison_df.to_string(index=False))
-                    
-                    # Сохраняем в файл
-                    filename = f"сравнение_городов_{vacation_type.replace(' ', '_')}.csv"
-                    comparison_df.to_csv(filename, index=False, encoding="utf-8")
+                if not comparison_df.empty:
+                    # Сохраняем в файл, на экран - первые города
+                    filename = report_path(
+                        f"сравнение_городов_{vacation_type.replace(' ', '_')}.csv", export_format
+                    )
+                    report = export_report([comparison_df], filename, export_format, preview_rows)
+                    print_preview(report)
                     print(f"\n💾 Результаты сравнения сохранены в файл '{filename}'")
                 else:
                     print(f"⚠️ Ни один город не подходит идеально для {vacation_type} отдыха")
             else:
                 print("❌ Неверный выбор типа отдыха.")
 
+        elif choice == "8":
+            # Лучшие даты начала поездки по ежедневным данным
+            print("\n📍 Доступные города:", ", ".join(get_weather_data()["cities"]))
+            city = input("Введите название города: ").strip()
+
+            try:
+                days = int(input("Сколько дней поездка? ").strip())
+                vacation_type = choose_vacation_type(
+                    "\n🎭 Выберите тип отдыха (другой ответ - просто комфортная погода):"
+                )
+                start = input("Дата начала ДД.ММ (Enter - подобрать лучшие): ").strip()
+
+                if city in get_weather_data()["cities"] and days > 0:
+                    temp_range, max_precip = trip_criteria(vacation_type)
+                    print(
+                        f"\n📊 Хороший день: {temp_range[0]}...{temp_range[1]}°C"
+                        f" и осадки не больше {max_precip} мм"
+                    )
+                    if vacation_type:
+                        print(f"📆 Начало поездки - в сезон: {vacation_rules.season(vacation_type)}")
+                    if start:
+                        trip_df = score_trip_start(city, start, days, vacation_type)
+                        print(f"\n🌡️ Климат в {city} на {start} (p10 - холодный год, p90 - жаркий):")
+                        print(get_day_climate(city, start).to_string(index=False))
+                        print(f"\n📅 Поездка в {city} с {start} на {days} дн.:")
+                        empty_message = "⚠️ Недостаточно данных о погоде для этих дат"
+                    else:
+                        trip_df = get_best_trip_starts(city, days, vacation_type)
+                        print(f"\n✅ Лучшие даты начала поездки в {city} на {days} дн.:")
+                        empty_message = "⚠️ Подходящих дат нет: ни в один год не было хороших дней"
+
+                    if not trip_df.empty:
+                        print(trip_df.to_string(index=False))
+                    else:
+                        print(empty_message)
+                else:
+                    print("⚠️ Проверьте правильность ввода города и длительности поездки.")
+            except ValueError:
+                print("❌ Пожалуйста, введите число дней и дату в формате ДД.ММ.")
+
+        elif choice == "9":
+            # Лучшие сочетания города и дат по всему каталогу
+            try:
+                days = int(input("Сколько дней поездка? ").strip())
+                vacation_type = choose_vacation_type(
+                    "\n🎭 Выберите тип отдыха (другой ответ - просто комфортная погода):"
+                )
+
+                if days > 0:
+                    if vacation_type:
+                        print(f"\n📆 Начало поездки - в сезон: {vacation_rules.season(vacation_type)}")
+                    # Не больше двух дат одного города, чтобы соседние дни не заняли весь список
+                    trips_df = find_best_trips(days, vacation_type, top=10, per_city=2)
+                    print(f"\n🏆 Лучшие города и даты для поездки на {days} дн.:")
+                    if not trips_df.empty:
+                        print(trips_df.to_string(index=False))
+                    else:
+                        print("⚠️ Подходящих дат нет (или недостаточно данных для поездки такой длительности)")
+                else:
+                    print("⚠️ Длительность поездки должна быть больше нуля.")
+            except ValueError:
+                print("❌ Пожалуйста, введите число дней.")
+
         elif choice == "7":
             print("\n✨ Спасибо за использование системы рекомендаций! Хороших путешествий! ✈️")
             break
             
         else:
-            print("❌ Неверный выбор. Пожалуйста, выберите опцию от 1 до 7.")
+            print("❌ Неверный выбор. Пожалуйста, выберите опцию от 1 до 9.")
 
 
 if __name__ == "__main__":
-    main()
+    arg_parser = argparse.ArgumentParser(description="Рекомендации для путешествий по России")
+    arg_parser.add_argument("--export-format", choices=list(FORMATS), default="csv",
+                            help="формат файлов с отчетами")
+    arg_parser.add_argument("--preview-rows", type=int, default=PREVIEW_ROWS,
+                            help="сколько строк отчета показывать на экране")
+    args = arg_parser.parse_args()
+    main(args.export_format, args.preview_rows)
@@ -4,6 +4,9 @@ import telebot
 import pandas as pd
 from datetime import datetime
 
+from vacation_rules import load_vacation_rules
+from weather_store import load_daily
+
 def get_token():
     """Загружает токен только из .env файла"""
 
@@ -35,11 +38,13 @@ except Exception as e:
 
 # Загрузка данных
 try:
-    df = pd.read_csv("weather_daily_all_cities.csv")#загрузка данныхх
-    df["Дата"] = pd.to_datetime(df["Дата"])
+    df = load_daily("weather_daily_all_cities.csv", columns=["Город"])#загрузка данныхх (нужен только список городов)
 except:
     df = pd.DataFrame()
 
+# Правила типов отдыха
+vacation_rules = load_vacation_rules()
+
 # Функции
 def get_weather_info(city, month):
     cities_data = {
@@ -65,20 +70,8 @@ def get_weather_info(city, month):
 
 
 def get_vacation_type(temp, month):
-    """Определение типа отдыха"""
-    if temp is None:
-        return "🎭 Разный"
-    
-    if 20 <= temp <= 32 and month in [6, 7, 8]:
-        return "🏖️ Пляжный"
-    elif 10 <= temp <= 25 and month in [5, 6, 9]:
-        return "🏛️ Экскурсионный"
-    elif -10 <= temp <= -2 and month in [12, 1, 2]:
-        return "⛷️ Горнолыжный"
-    elif 5 <= temp <= 25 and month in [4, 5, 6, 9, 10]:
-        return "🏙️ Городской"
-    else:
-        return "🎭 Разный"
+    """Определение типа отдыха (правила - в vacation_rules.json)"""
+    return vacation_rules.type_name(temp, month, short=True)
 
 # Обработчики команд
 @bot.message_handler(commands=['start'])
@@ -117,11 +110,8 @@ def send_help(message):
 /help - Эта справка
 
 🎭 Типы отдыха:
-🏖️ Пляжный (20-32°C) - июнь-август
-🏛️ Экскурсионный (10-25°C) - май, июнь, сентябрь
-⛷️ Горнолыжный (-10...-2°C) - декабрь-февраль
-🏙️ Городской (5-25°C) - апрель-июнь, сентябрь-октябрь
-    """
+{}
+    """.format("\n".join(vacation_rules.describe(short=True, separator=" - ")))
     bot.send_message(message.chat.id, help_text)
 
 @bot.message_handler(commands=['cities'])
@@ -0,0 +1,88 @@
+"""Сравнение движков разбора таблицы архива на сохраненных страницах.
+Страницы берутся из папки fixtures/ (*.html) и, при желании, из кэша парсера (*.html.gz).
+
+Запуск:
+    python bench_extract.py
+    python bench_extract.py --pages .weather_cache --repeat 10
+"""
+import os  # Для поиска файлов страниц
+import gzip  # Для страниц из кэша
+import time  # Для замера времени
+import argparse  # Для параметров командной строки
+
+import numpy as np  # Для сравнения результатов
+
+from weather_extract import ENGINES, VALUE_COLUMNS
+
+
+def load_pages(folder):
+    """Читает все сохраненные страницы из папки (включая подпапки)"""
+    pages = []
+    for root, _, files in os.walk(folder):
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            if name.endswith(".html"):
+                with open(path, encoding="utf-8") as f:
+                    pages.append((path, f.read()))
+            elif name.endswith(".html.gz"):
+                with gzip.open(path, "rt", encoding="utf-8") as f:
+                    pages.append((path, f.read()))
+    return pages
+
+
+def same_columns(left, right):
+    """Проверяет, что два движка вернули одинаковые данные"""
+    if left is None or right is None:
+        return left is right
+    if left["Дата"] != right["Дата"]:
+        return False
+    return all(
+        np.array_equal(left[name], right[name], equal_nan=True) for name in VALUE_COLUMNS
+    )
+
+
+def benchmark(pages, repeat):
+    """Замеряет лучшее из repeat время разбора всех страниц каждым движком"""
+    results = {}
+    for engine, extract in ENGINES.items():
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _, html in pages:
+                extract(html)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        results[engine] = best
+    return results
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Бенчмарк движков разбора таблицы")
+    arg_parser.add_argument("--pages", default="fixtures", help="папка с сохраненными страницами")
+    arg_parser.add_argument("--repeat", type=int, default=5, help="сколько раз повторить замер")
+    args = arg_parser.parse_args()
+
+    pages = load_pages(args.pages)
+    if not pages:
+        print(f"❌ В папке {args.pages} нет сохраненных страниц")
+        return
+
+    # Сначала проверяем, что движки дают одинаковый результат
+    total_rows = 0
+    for path, html in pages:
+        columns = {engine: extract(html) for engine, extract in ENGINES.items()}
+        if not same_columns(columns["fast"], columns["bs4"]):
+            print(f"⚠️ Движки разошлись на странице {path}")
+        if columns["bs4"] is not None:
+            total_rows += len(columns["bs4"]["Дата"])
+
+    print(f"📄 Страниц: {len(pages)}, строк: {total_rows:,}")
+    results = benchmark(pages, args.repeat)
+    for engine, elapsed in results.items():
+        speed = total_rows / elapsed if elapsed > 0 else float("inf")
+        print(f"  {engine:5}: {elapsed * 1000:8.1f} мс  ({speed:,.0f} строк/с)")
+    print(f"🚀 Ускорение fast относительно bs4: {results['bs4'] / results['fast']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
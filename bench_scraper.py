@@ -0,0 +1,89 @@
+"""Замер скорости парсера на локальном тестовом архиве (без сети).
+Запускает mock_pogoda_server.py в фоне и собирает данные для N выдуманных станций
+при разных настройках параллельности.
+
+Запуск:
+    python bench_scraper.py
+    python bench_scraper.py --stations 200 --years 3 --latency 0.3 --concurrency 1 4 16 --rps 50
+"""
+import time  # Для замера времени
+import asyncio  # Для запуска асинхронного сбора
+import argparse  # Для параметров командной строки
+import importlib  # Имя модуля парсера начинается с цифры - обычный import не подходит
+
+from mock_pogoda_server import start_mock_server
+from weather_fetch import RetryPolicy
+
+weather_parser = importlib.import_module("1parserweather")
+
+
+def run_once(base_url, stations, concurrency, rps, engine, parse_workers=0):
+    """Один прогон сбора; возвращает (секунды, собрано строк, неудачных заданий)"""
+    parser = weather_parser.DailyWeatherParser(engine=engine, base_url=base_url)
+    parser.fetcher.retry = RetryPolicy(base_delay=0.1)  # короткие паузы, чтобы замер не растягивался
+    started = time.perf_counter()
+    asyncio.run(
+        parser.parse_cities_async(
+            stations,
+            max_concurrency=concurrency,
+            requests_per_second=rps,
+            parse_workers=parse_workers,
+        )
+    )
+    return time.perf_counter() - started, len(parser.daily_data), len(parser.failed_jobs)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Замер скорости парсера на тестовом архиве")
+    arg_parser.add_argument("--stations", type=int, default=50, help="число станций")
+    arg_parser.add_argument("--years", type=int, default=3, help="лет данных на станцию")
+    arg_parser.add_argument("--latency", type=float, default=0.2, help="задержка ответа сервера, с")
+    arg_parser.add_argument("--jitter", type=float, default=0.1, help="разброс задержки, с")
+    arg_parser.add_argument("--error-rate", type=float, default=0.0, help="доля ответов с ошибкой")
+    arg_parser.add_argument("--max-rows", type=int, help="ограничение строк на странице")
+    arg_parser.add_argument(
+        "--concurrency", type=int, nargs="+", default=[1, 4, 16], help="варианты параллельности"
+    )
+    arg_parser.add_argument("--rps", type=float, default=100.0, help="лимит запросов в секунду")
+    arg_parser.add_argument("--engine", choices=["fast", "bs4"], default="fast")
+    arg_parser.add_argument(
+        "--parse-workers", type=int, default=0, help="процессов разбора (0 - в основном процессе)"
+    )
+    args = arg_parser.parse_args()
+
+    server, base_url = start_mock_server(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        max_rows=args.max_rows,
+    )
+    end_year = 2022 + args.years - 1
+    stations = [
+        (f"Станция {i}", str(100000 + i), "01.01.2022", f"31.12.{end_year}")
+        for i in range(args.stations)
+    ]
+
+    results = []
+    try:
+        for concurrency in args.concurrency:
+            elapsed, rows, failed = run_once(
+                base_url, stations, concurrency, args.rps, args.engine, args.parse_workers
+            )
+            results.append((concurrency, elapsed, rows, failed))
+    finally:
+        server.shutdown()
+
+    print("\n" + "=" * 70)
+    print(f"📊 Станций: {args.stations}, лет: {args.years}, задержка: {args.latency} с, "
+          f"лимит: {args.rps} запр/с, движок: {args.engine}, процессов разбора: {args.parse_workers}")
+    print("=" * 70)
+    for concurrency, elapsed, rows, failed in results:
+        print(
+            f"  параллельно {concurrency:3}: {elapsed:7.2f} с, "
+            f"{args.stations / elapsed:6.1f} станций/с, {rows / elapsed:9,.0f} строк/с"
+            + (f", неудачных: {failed}" if failed else "")
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""Проверка быстрых вычислений поездок и климата против простого расчета в лоб
+на небольших случайных данных (с фиксированным seed - результат воспроизводим):
+- window_scores для многих городов сразу - как по каждому городу отдельно;
+- top_windows (куча) - как полная сортировка всех пар;
+- _pooled_quantiles - как np.quantile по каждой группе (город, день года).
+
+Запуск:
+    python check_kernels.py
+    python check_kernels.py --seed 7 --cities 12
+"""
+import sys  # Для кода возврата
+import argparse  # Для параметров командной строки
+
+import numpy as np  # Для случайных данных и сравнения
+
+from climatology import QUANTILES, _pooled_quantiles
+from trip_windows import DAYS_IN_YEAR, default_min_years, leap_day_of_year, top_windows, window_scores
+from weather_columns import EPOCH_ORDINAL
+
+
+def make_series(rng, cities, years):
+    """Ежедневные ряды городов друг за другом (как у DailySeries): у каждого города
+    свой период с пропусками дней и NaN; один город - без данных"""
+    first = int(np.datetime64("2015-01-01").astype(np.int64)) + EPOCH_ORDINAL
+    ordinal, temp, precip, counts = [], [], [], []
+    for city in range(cities):
+        if city == 1:
+            counts.append(0)  # город без данных
+            continue
+        start = first + int(rng.integers(0, 400))
+        days = np.arange(start, start + int(rng.integers(20, years * 365)))
+        days = days[rng.random(len(days)) > 0.1]  # пропущенные дни
+        city_temp = np.round(rng.normal(15, 10, len(days)), 1)  # с повторами значений
+        city_temp[rng.random(len(days)) < 0.05] = np.nan
+        city_precip = np.round(rng.exponential(3, len(days)), 1)
+        city_precip[rng.random(len(days)) < 0.1] = np.nan
+        ordinal.append(days)
+        temp.append(city_temp)
+        precip.append(city_precip)
+        counts.append(len(days))
+    offsets = np.concatenate(([0], np.cumsum(counts)))
+    return (
+        np.concatenate(ordinal).astype(np.int32),
+        np.concatenate(temp).astype(np.float32),
+        np.concatenate(precip).astype(np.float32),
+        offsets,
+    )
+
+
+def check_window_scores(ordinal, temp, precip, offsets):
+    """Все города одним вызовом - то же, что вызовы по каждому городу"""
+    problems = []
+    for days in (1, 7, 30, 400):
+        together = window_scores(ordinal, temp, precip, days, offsets=offsets)
+        for city in range(len(offsets) - 1):
+            rows = slice(offsets[city], offsets[city + 1])
+            if offsets[city] == offsets[city + 1]:
+                expected = [np.zeros(0)] * 5
+            else:
+                expected = list(window_scores(ordinal[rows], temp[rows], precip[rows], days))
+                expected[0] = np.full(len(expected[1]), city)
+            mine = together[0] == city
+            for name, left, right in zip(
+                ("город", "начало", "оценка", "температура", "осадки"), together, expected
+            ):
+                same = len(left[mine]) == len(right) and np.allclose(
+                    left[mine], right, equal_nan=True, rtol=1e-9, atol=1e-9
+                )
+                if not same:
+                    problems.append(f"window_scores: {days} дн., город {city}, {name}")
+    return problems
+
+
+def check_top_windows(rng, cities):
+    """Куча top_windows - то же, что полная сортировка всех пар"""
+    problems = []
+    shape = (cities, DAYS_IN_YEAR)
+    score = np.round(rng.random(shape) * 10)  # много равных оценок
+    worst = np.round(rng.random(shape) * 5)
+    years = rng.integers(0, 6, shape)
+    min_years = default_min_years(years)
+
+    city, day = np.nonzero((years >= min_years) & (score > 0))  # оценка 0 - не подходит
+    order = np.lexsort((day, city, -worst[city, day], -score[city, day]))
+    expected = list(zip(city[order].tolist(), day[order].tolist()))
+
+    for top in (None, 0, -1, 1, 5, 50, len(expected) + 10):
+        for per_city in (None, 3):
+            result = top_windows(score, worst, years, top=top, per_city=per_city)
+            wanted = expected
+            if per_city is not None:
+                # Не больше per_city лучших дней каждого города
+                taken = {}
+                wanted = []
+                for pair in expected:
+                    if taken.get(pair[0], 0) < per_city:
+                        taken[pair[0]] = taken.get(pair[0], 0) + 1
+                        wanted.append(pair)
+            if top is not None:
+                wanted = wanted[:max(top, 0)]
+            if result != wanted:
+                problems.append(f"top_windows: top={top}, per_city={per_city}")
+    return problems
+
+
+def check_pooled_quantiles(ordinal, temp, offsets, half_window=3):
+    """Процентили одной сортировкой - то же, что np.quantile по каждой группе"""
+    cities = len(offsets) - 1
+    has_temp = ~np.isnan(temp)
+    cells = np.repeat(np.arange(cities, dtype=np.int64) * DAYS_IN_YEAR, np.diff(offsets))[has_temp]
+    day_of_year = leap_day_of_year(ordinal)[has_temp]
+    values = temp[has_temp].astype(np.float64)
+    shifts = np.arange(-half_window, half_window + 1)
+
+    # В лоб: значения каждой группы (город, день года) по всем сдвигам окна
+    groups = {}
+    for shift in shifts:
+        cell = cells + (day_of_year + shift) % DAYS_IN_YEAR
+        for key, value in zip(cell.tolist(), values.tolist()):
+            groups.setdefault(key, []).append(value)
+    counts = np.zeros(cities * DAYS_IN_YEAR, dtype=np.int64)
+    expected = np.full((len(QUANTILES), cities * DAYS_IN_YEAR), np.nan)
+    for key, group in groups.items():
+        counts[key] = len(group)
+        expected[:, key] = np.quantile(group, QUANTILES)
+
+    result = _pooled_quantiles(cells, day_of_year, values, shifts, counts, QUANTILES)
+    if not np.allclose(result, expected, equal_nan=True, rtol=1e-9, atol=1e-9):
+        return ["_pooled_quantiles: расхождение с np.quantile"]
+    return []
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Проверка быстрых вычислений против расчета в лоб")
+    arg_parser.add_argument("--seed", type=int, default=2024, help="seed случайных данных")
+    arg_parser.add_argument("--cities", type=int, default=6, help="сколько городов")
+    arg_parser.add_argument("--years", type=int, default=3, help="сколько лет данных (не больше)")
+    args = arg_parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    ordinal, temp, precip, offsets = make_series(rng, args.cities, args.years)
+    print(f"📄 Городов: {args.cities}, дней с данными: {len(ordinal):,}")
+
+    problems = (
+        check_window_scores(ordinal, temp, precip, offsets)
+        + check_top_windows(rng, args.cities)
+        + check_pooled_quantiles(ordinal, temp, offsets)
+    )
+    for problem in problems:
+        print(f"⚠️ {problem}")
+    if problems:
+        sys.exit(1)
+    print("✅ Быстрые вычисления совпадают с расчетом в лоб")
+
+
+if __name__ == "__main__":
+    main()
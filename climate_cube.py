@@ -0,0 +1,26 @@
+"""Климатические средние по городам и месяцам, посчитанные один раз при загрузке данных.
+Вместо фильтрации всей таблицы за каждый день при каждом запросе - одна группировка;
+по ней TRAVELL.py строит словарь (город, месяц) -> средние, поиск в котором занимает O(1)"""
+WARM_DAY_TEMP = 15  # День считается солнечным (теплым), если средняя температура выше
+
+
+def build_climate_cube(df):
+    """Таблица с индексом (Город, Месяц): средние температура, осадки, ветер,
+    число дней и доля дней со средней температурой выше WARM_DAY_TEMP"""
+    # Средние считаем в float64, даже если данные загружены как float32
+    data = df[["Город", "Месяц"]].assign(
+        Сред_температура=df["Сред_температура"].astype("float64"),
+        Осадки_мм=df["Осадки_мм"].astype("float64"),
+        Скорость_ветра_мс=df["Скорость_ветра_мс"].astype("float64"),
+        Теплый=df["Сред_температура"] > WARM_DAY_TEMP,
+    )
+    cube = data.groupby(["Город", "Месяц"], observed=True, sort=True).agg(
+        Сред_температура=("Сред_температура", "mean"),
+        Осадки_мм=("Осадки_мм", "mean"),
+        Скорость_ветра_мс=("Скорость_ветра_мс", "mean"),
+        Дней=("Теплый", "size"),  # все дни, в том числе без данных - как shape[0] раньше
+        Теплых_дней=("Теплый", "sum"),
+    )
+    cube["Солнечных_дней_%"] = cube["Теплых_дней"] / cube["Дней"] * 100
+    return cube
+
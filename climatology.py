@@ -0,0 +1,156 @@
+"""Климат по дням года: для каждого города и дня (календарь високосного года)
+средняя температура, 10/50/90-й процентили температуры, средние осадки и вероятность
+дождливого дня. Дни года сглаживаются окном (по умолчанию ±3 дня), поэтому для каждого
+дня набирается около недели наблюдений за каждый год.
+Вся таблица считается за один проход: суммы - одним bincount и сдвигами по дням года,
+процентили - одной сортировкой ключей (группа, ранг значения) и выборкой по позициям.
+Ответ на вопрос "какая температура в Сочи 15 июля в худшем случае" - поиск
+в массиве [город, день года]"""
+import numpy as np  # Для векторных вычислений
+import pandas as pd  # Для таблицы ответа
+
+from trip_windows import DAYS_IN_YEAR, day_of_year_label, leap_day_of_year, parse_day_of_year
+
+HALF_WINDOW = 3  # Сколько соседних дней с каждой стороны учитывать для дня года
+WET_DAY_MM = 1.0  # День с осадками не меньше этого считается дождливым
+QUANTILES = (0.1, 0.5, 0.9)  # Процентили температуры: таблицы temp_p10, temp_p50, temp_p90
+
+
+def climatology_settings(half_window=None, wet_day_mm=None):
+    """Настройки, от которых зависит таблица (для ключа снимка);
+    None - текущие значения HALF_WINDOW и WET_DAY_MM"""
+    return (
+        HALF_WINDOW if half_window is None else half_window,
+        WET_DAY_MM if wet_day_mm is None else wet_day_mm,
+        tuple(QUANTILES),
+    )
+
+
+def _pool(grid, shifts):
+    """Сглаживание по дням года: сумма сдвинутых копий таблицы [город, 366]
+    (через конец года - по кругу)"""
+    return sum(np.roll(grid, shift, axis=1) for shift in shifts)
+
+
+def _pooled_quantiles(cells, day_of_year, values, shifts, counts, quantiles):
+    """Процентили значений (как np.quantile с линейной интерполяцией) для каждого
+    города и сглаженного дня года. cells - город * 366 каждого значения,
+    counts - число значений в каждой группе [город, 366].
+    Возвращает массив [процентиль, город, 366]; группа без значений - NaN"""
+    # Один ключ сортировки: группа, затем ранг значения среди различных значений.
+    # Каждое значение входит в группы всех дней года своего окна. После сортировки
+    # значения каждой группы идут подряд по возрастанию
+    uniques, value_rank = np.unique(values, return_inverse=True)
+    keys = np.empty((len(shifts), len(values)), dtype=np.int64)
+    for index, shift in enumerate(shifts):
+        keys[index] = (cells + (day_of_year + shift) % DAYS_IN_YEAR) * len(uniques) + value_rank
+    keys = keys.ravel()
+    keys.sort()
+
+    counts = counts.ravel()
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    present = counts > 0
+    result = np.full((len(quantiles), len(counts)), np.nan)
+    for row, quantile in enumerate(quantiles):
+        position = quantile * (counts[present] - 1)
+        low = np.floor(position).astype(np.int64)
+        high = np.minimum(low + 1, counts[present] - 1)
+        fraction = position - low
+        # Значения берутся только в нужных позициях - весь отсортированный массив не нужен
+        low_values = uniques[keys[starts[present] + low] % len(uniques)]
+        high_values = uniques[keys[starts[present] + high] % len(uniques)]
+        result[row, present] = low_values + fraction * (high_values - low_values)
+    return result
+
+
+class Climatology:
+    """Таблица климата: массивы [город, 366] и поиск по названию города и дню года"""
+
+    COLUMNS = {
+        "temp_mean": "Средняя температура",
+        "temp_p10": "Температура p10",
+        "temp_p50": "Температура p50",
+        "temp_p90": "Температура p90",
+        "precip_mean": "Осадки (мм/день)",
+        "wet_probability": "Вероятность дождя, %",
+        "samples": "Наблюдений",
+    }
+
+    def __init__(self, series, half_window=None, wet_day_mm=None):
+        """series - ежедневные ряды городов (trip_windows.DailySeries);
+        half_window и wet_day_mm - None: значения по умолчанию модуля"""
+        self.settings = climatology_settings(half_window, wet_day_mm)
+        half_window, wet_day_mm, _ = self.settings
+        self.city_names = list(series.city_names)
+        self.half_window = half_window
+        cities = len(self.city_names)
+        shape = (cities, DAYS_IN_YEAR)
+
+        cells = np.repeat(np.arange(cities, dtype=np.int64) * DAYS_IN_YEAR, np.diff(series.offsets))
+        day_of_year = leap_day_of_year(series.ordinal)
+        shifts = np.arange(-half_window, half_window + 1)
+
+        temp = series.temp.astype(np.float64)
+        precip = series.precip.astype(np.float64)
+        has_temp = ~np.isnan(temp)
+        has_precip = ~np.isnan(precip)
+
+        def pooled_sum(weights):
+            # Суммы по дням года, затем - по окну соседних дней
+            grid = np.bincount(cells + day_of_year, weights=weights, minlength=cities * DAYS_IN_YEAR)
+            return _pool(grid.reshape(shape), shifts)
+
+        samples = pooled_sum(has_temp)
+        precip_days = pooled_sum(has_precip)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            temp_mean = pooled_sum(np.where(has_temp, temp, 0)) / samples
+            precip_mean = pooled_sum(np.where(has_precip, precip, 0)) / precip_days
+            wet_probability = 100 * pooled_sum(has_precip & (precip >= wet_day_mm)) / precip_days
+
+        # Процентили - по наблюдениям с температурой, в каждом из дней года своего окна
+        quantiles = _pooled_quantiles(
+            cells[has_temp], day_of_year[has_temp], temp[has_temp], shifts,
+            samples.astype(np.int64), QUANTILES,
+        ).reshape((len(QUANTILES),) + shape)
+
+        self.tables = {
+            "temp_mean": temp_mean.astype(np.float32),
+            "temp_p10": quantiles[0].astype(np.float32),
+            "temp_p50": quantiles[1].astype(np.float32),
+            "temp_p90": quantiles[2].astype(np.float32),
+            "precip_mean": precip_mean.astype(np.float32),
+            "wet_probability": wet_probability.astype(np.float32),
+            "samples": samples.astype(np.int32),
+        }
+        self._positions = {name: index for index, name in enumerate(self.city_names)}
+
+    def __contains__(self, city_name):
+        return city_name in self._positions
+
+    def lookup(self, cities, days):
+        """Климат для массивов городов и дней года ('15.07' или номер дня от 0 до 365).
+        Неизвестный город - NaN и 0 наблюдений; неверный день - ValueError"""
+        cities = np.atleast_1d(np.asarray(cities, dtype=object))
+        days = np.atleast_1d(np.asarray(days, dtype=object))
+        rows = np.array([self._positions.get(city, -1) for city in cities], dtype=np.int64)
+        columns = np.array(
+            [parse_day_of_year(day) if isinstance(day, str) else int(day) for day in days],
+            dtype=np.int64,
+        )
+        if columns.size and (columns.min() < 0 or columns.max() >= DAYS_IN_YEAR):
+            raise ValueError(f"❌ День года должен быть от 0 до {DAYS_IN_YEAR - 1}")
+        rows, columns = np.broadcast_arrays(rows, columns)
+        known = rows >= 0
+
+        result = pd.DataFrame({
+            "Город": np.broadcast_to(cities, rows.shape),
+            "День": [day_of_year_label(day) for day in columns],
+        })
+        safe_rows = np.where(known, rows, 0)
+        for key, title in self.COLUMNS.items():
+            values = self.tables[key][safe_rows, columns]
+            if key == "samples":
+                result[title] = np.where(known, values, 0)
+            else:
+                result[title] = np.round(np.where(known, values, np.nan).astype(float), 1)
+        return result
@@ -0,0 +1,189 @@
+"""Локальная замена сайта pogoda-service.ru для тестов и замеров скорости парсера.
+Отдает archive_gsod_res.php в том же виде таблицы для любой станции и диапазона дат.
+Значения детерминированы (зависят от станции и дня), поэтому результаты повторяемы.
+Можно задать задержку ответа, долю ошибок и ограничение числа строк на странице.
+
+Запуск:
+    python mock_pogoda_server.py --port 8080 --latency 0.2 --error-rate 0.05
+    python 1parserweather.py --base-url http://127.0.0.1:8080/archive_gsod_res.php --no-cache
+"""
+import time  # Для имитации задержки
+import zlib  # Для числового "зерна" станции
+import random  # Для случайных ошибок и разброса задержки
+import argparse  # Для параметров командной строки
+import threading  # Для запуска сервера в фоне
+from datetime import date, datetime  # Для разбора дат запроса
+from urllib.parse import parse_qs, urlsplit  # Для разбора адреса запроса
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer  # Встроенный HTTP-сервер
+
+import numpy as np  # Для быстрой генерации значений
+
+ARCHIVE_PATH = "/archive_gsod_res.php"
+
+HEADER_ROW = (
+    "<tr><th>Дата</th><th>T max, &deg;C</th><th>T min, &deg;C</th><th>T ср., &deg;C</th>"
+    "<th>Давление, гПа</th><th>Ветер, м/с</th><th>Осадки, мм</th></tr>"
+)
+
+
+def _uniform(station_seed, ordinals, salt):
+    """Детерминированные "случайные" числа 0..1 для станции и дней (простой хэш)"""
+    x = (ordinals.astype(np.uint64) * np.uint64(2654435761) + np.uint64(station_seed + salt * 7919))
+    x ^= x >> np.uint64(13)
+    x *= np.uint64(0x5BD1E995)
+    x ^= x >> np.uint64(15)
+    return (x & np.uint64(0xFFFFFF)).astype(np.float64) / 0xFFFFFF
+
+
+def archive_rows(station, start, end, missing_rate=0.02):
+    """Строки таблицы для станции за период start..end (включительно)"""
+    seed = zlib.crc32(station.encode("utf-8"))
+    ordinals = np.arange(start.toordinal(), end.toordinal() + 1)
+    if len(ordinals) == 0:
+        return []
+
+    # Сезонный ход температуры: у каждой станции свои средняя и амплитуда
+    base = (seed % 25) - 5
+    amplitude = 8 + seed % 12
+    day_of_year = (ordinals - date(2000, 1, 1).toordinal()) % 365.25
+    noise = (_uniform(seed, ordinals, 1) - 0.5) * 6
+    avg = base - amplitude * np.cos(2 * np.pi * (day_of_year - 20) / 365.25) + noise
+    spread = 2 + _uniform(seed, ordinals, 2) * 4
+    pressure = 1013 + (_uniform(seed, ordinals, 3) - 0.5) * 20
+    wind = _uniform(seed, ordinals, 4) * 8
+    rain = np.maximum(0, (_uniform(seed, ordinals, 5) - 0.6) * 25)
+    missing = _uniform(seed, ordinals, 6) < missing_rate
+
+    rows = []
+    for i, ordinal in enumerate(ordinals.tolist()):
+        day = date.fromordinal(ordinal)
+        avg_text = "" if missing[i] else f"{avg[i]:.1f}"
+        rows.append(
+            f"<tr><td>{day:%d.%m.%Y}</td><td>{avg[i] + spread[i]:.1f}</td>"
+            f"<td>{avg[i] - spread[i]:.1f}</td><td>{avg_text}</td>"
+            f"<td>{pressure[i]:.1f}</td><td>{wind[i]:.1f}</td><td>{rain[i]:.1f}</td></tr>"
+        )
+    return rows
+
+
+def archive_page(station, start, end, max_rows=None, missing_rate=0.02):
+    """HTML-страница архива в формате сайта"""
+    rows = archive_rows(station, start, end, missing_rate)
+    if max_rows is not None:
+        rows = rows[:max_rows]  # сайт может отдавать не больше max_rows строк
+    return (
+        '<!DOCTYPE html>\n<html lang="ru">\n<head><meta charset="utf-8">'
+        f"<title>Архив погоды: станция {station}</title></head>\n<body>\n"
+        f"<h2>Архив погоды по данным GSOD: {start:%d.%m.%Y} - {end:%d.%m.%Y}</h2>\n"
+        '<table class="archive_table" border="1">\n'
+        + HEADER_ROW + "\n" + "\n".join(rows) + "\n</table>\n</body>\n</html>\n"
+    )
+
+
+class MockArchiveHandler(BaseHTTPRequestHandler):
+    """Обработчик запросов; настройки берутся из атрибутов сервера"""
+
+    def do_GET(self):
+        server = self.server
+        url = urlsplit(self.path)
+        if url.path != ARCHIVE_PATH:
+            self.send_error(404)
+            return
+
+        # Имитация задержки сети и сервера
+        delay = server.latency + random.uniform(0, server.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+        if random.random() < server.error_rate:
+            server.errors += 1
+            self.send_error(server.error_status)
+            return
+
+        query = parse_qs(url.query)
+        try:
+            station = query["station"][0]
+            start = datetime.strptime(query["datepicker_beg"][0], "%d.%m.%Y").date()
+            end = datetime.strptime(query["datepicker_end"][0], "%d.%m.%Y").date()
+        except (KeyError, ValueError):
+            self.send_error(400)
+            return
+
+        body = archive_page(
+            station, start, end, server.max_rows, server.missing_rate
+        ).encode("utf-8")
+        server.pages += 1
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Не засоряем вывод строкой на каждый запрос
+
+
+def make_server(
+    host="127.0.0.1",
+    port=0,
+    latency=0.0,
+    jitter=0.0,
+    error_rate=0.0,
+    error_status=503,
+    max_rows=None,
+    missing_rate=0.02,
+):
+    """Создает сервер (port=0 - любой свободный порт)"""
+    server = ThreadingHTTPServer((host, port), MockArchiveHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.jitter = jitter
+    server.error_rate = error_rate
+    server.error_status = error_status
+    server.max_rows = max_rows
+    server.missing_rate = missing_rate
+    server.pages = 0  # счетчики для замеров
+    server.errors = 0
+    return server
+
+
+def start_mock_server(**options):
+    """Запускает сервер в фоновом потоке. Возвращает (сервер, адрес archive_gsod_res.php);
+    остановка - server.shutdown()"""
+    server = make_server(**options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}{ARCHIVE_PATH}"
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Локальная замена архива pogoda-service.ru")
+    arg_parser.add_argument("--host", default="127.0.0.1")
+    arg_parser.add_argument("--port", type=int, default=8080)
+    arg_parser.add_argument("--latency", type=float, default=0.0, help="задержка ответа, с")
+    arg_parser.add_argument("--jitter", type=float, default=0.0, help="случайная добавка к задержке, с")
+    arg_parser.add_argument("--error-rate", type=float, default=0.0, help="доля ответов с ошибкой (0..1)")
+    arg_parser.add_argument("--error-status", type=int, default=503, help="HTTP-код ошибки")
+    arg_parser.add_argument("--max-rows", type=int, help="не больше строк таблицы на странице")
+    arg_parser.add_argument("--missing-rate", type=float, default=0.02, help="доля дней без температуры")
+    args = arg_parser.parse_args()
+
+    server = make_server(
+        args.host,
+        args.port,
+        args.latency,
+        args.jitter,
+        args.error_rate,
+        args.error_status,
+        args.max_rows,
+        args.missing_rate,
+    )
+    print(f"🌐 Тестовый архив: http://{args.host}:{args.port}{ARCHIVE_PATH}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n⏹️  Остановлен. Отдано страниц: {server.pages}, ошибок: {server.errors}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Потоковая выгрузка отчетов с рекомендациями.
+Отчет пишется частями по мере расчета - в CSV, Parquet или JSON Lines, - поэтому вся
+таблица не собирается в памяти еще раз для записи. Для экрана запоминаются только первые
+строки: вместо огромной текстовой таблицы показывается короткий просмотр"""
+import os  # Для имен файлов
+
+import pandas as pd  # Для частей отчета
+
+try:
+    import pyarrow as pa  # Колоночные таблицы Arrow
+    import pyarrow.parquet as pq  # Запись Parquet по частям
+except ImportError:  # pyarrow нужен только для Parquet
+    pa = None
+    pq = None
+
+# Форматы выгрузки: имя для пользователя -> расширение файла
+FORMATS = {"csv": ".csv", "parquet": ".parquet", "jsonl": ".jsonl"}
+PREVIEW_ROWS = 20  # Сколько строк отчета показывать на экране
+CHUNK_ROWS = 50_000  # Сколько строк рассчитывать и записывать за раз
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("❌ Для Parquet нужен pyarrow: pip install pyarrow")
+
+
+def _parquet_schema(chunk):
+    """Схема Parquet по типам колонок pandas, а не по значениям первой части:
+    целые - целые той же разрядности (как в CSV и JSON Lines), дробные - float64,
+    текст и колонки без значений - строки"""
+    fields = []
+    for name, dtype in chunk.dtypes.items():
+        if pd.api.types.is_bool_dtype(dtype):
+            arrow_type = pa.bool_()
+        elif pd.api.types.is_integer_dtype(dtype):
+            # Int64 и другие целые pandas с пропусками - по их numpy-типу
+            arrow_type = pa.from_numpy_dtype(getattr(dtype, "numpy_dtype", dtype))
+        elif pd.api.types.is_numeric_dtype(dtype):
+            arrow_type = pa.float64()
+        elif pd.api.types.is_datetime64_any_dtype(dtype):
+            arrow_type = pa.timestamp("ns")
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(str(name), arrow_type))
+    return pa.schema(fields)
+
+
+def _parquet_table(chunk, schema):
+    """Часть отчета в схеме файла: текстовые колонки приводятся к строкам, целые - к целым
+    pandas с пропусками (NaN - null; дробное значение - ошибка, а не обрезание)"""
+    types = {field.name: "string" for field in schema if pa.types.is_string(field.type)}
+    for field in schema:
+        if pa.types.is_integer(field.type) and not pd.api.types.is_integer_dtype(chunk[field.name]):
+            types[field.name] = "Int64"
+    if types:
+        chunk = chunk.astype(types)
+    return pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+
+
+def report_path(filename, fmt="csv"):
+    """Имя файла с расширением формата: отчет.csv -> отчет.parquet"""
+    root, _ = os.path.splitext(filename)
+    return root + FORMATS[fmt]
+
+
+class ReportWriter:
+    """Запись отчета по частям. Считает строки и запоминает первые preview_rows строк"""
+
+    def __init__(self, path, fmt="csv", preview_rows=PREVIEW_ROWS):
+        if fmt not in FORMATS:
+            raise ValueError(f"❌ Неизвестный формат {fmt}: доступны {', '.join(FORMATS)}")
+        if fmt == "parquet":
+            _require_pyarrow()
+        self.path = path
+        self.fmt = fmt
+        self.preview_rows = preview_rows
+        self.rows = 0
+        self.preview = pd.DataFrame()
+        self.columns = None  # колонки отчета - по первой части (она может быть пустой)
+        self._parquet_writer = None
+        # CSV и JSON Lines создаются сразу; Parquet - с первой частью, потому что
+        # схема берется из нее (без частей - при закрытии, пустым файлом)
+        self._file = None if fmt == "parquet" else open(path, "w", encoding="utf-8", newline="")
+
+    def _start(self, chunk):
+        """Заголовок CSV или схема Parquet по первой части - и для отчета без строк"""
+        self.columns = list(chunk.columns)
+        if self.fmt == "csv":
+            chunk.head(0).to_csv(self._file, index=False)
+        elif self.fmt == "parquet":
+            # Схема файла - по типам колонок первой части, все части приводятся к ней
+            self._parquet_writer = pq.ParquetWriter(self.path, _parquet_schema(chunk))
+
+    def write(self, chunk):
+        """Дописывает часть отчета"""
+        if self.columns is None:
+            self._start(chunk)
+        if chunk.empty:
+            return
+        if self.fmt == "csv":
+            chunk.to_csv(self._file, header=False, index=False)
+        elif self.fmt == "jsonl":
+            lines = chunk.to_json(orient="records", lines=True, force_ascii=False)
+            # Старые версии pandas не ставят перевод строки после последней записи
+            self._file.write(lines if lines.endswith("\n") else lines + "\n")
+        else:
+            self._parquet_writer.write_table(_parquet_table(chunk, self._parquet_writer.schema))
+
+        needed = self.preview_rows - len(self.preview)
+        if needed > 0:
+            head = chunk.head(needed).reset_index(drop=True)
+            self.preview = head if self.preview.empty else pd.concat([self.preview, head], ignore_index=True)
+        self.rows += len(chunk)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+        elif self.fmt == "parquet":
+            pq.write_table(pa.table({}), self.path)  # отчет без частей - файл без колонок
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def export_report(chunks, path, fmt="csv", preview_rows=PREVIEW_ROWS):
+    """Записывает все части отчета в файл. Возвращает writer: число строк и первые строки"""
+    with ReportWriter(path, fmt, preview_rows) as writer:
+        for chunk in chunks:
+            writer.write(chunk)
+    return writer
+
+
+def print_preview(writer):
+    """Показывает первые строки отчета и сколько строк осталось только в файле"""
+    if writer.preview.empty:
+        return
+    print(writer.preview.to_string(index=False))
+    hidden = writer.rows - len(writer.preview)
+    if hidden > 0:
+        print(f"... и еще {hidden} строк (полностью - в файле '{writer.path}')")
@@ -0,0 +1,237 @@
+"""Оценка поездок на любое число дней по ежедневным данным.
+Для города строится непрерывный ряд дней; суммы по скользящему окну считаются через
+накопленные суммы (cumsum), поэтому все возможные даты начала за все годы оцениваются
+за одну векторную операцию. Затем оценки собираются по дню года (календарь високосного
+года, 29 февраля - отдельный день) и ранжируются"""
+import heapq  # Для выбора лучших пар без полной сортировки
+from datetime import date, timedelta  # Для подписей дней года
+
+import numpy as np  # Для векторных вычислений
+import pandas as pd  # Для таблицы результата
+
+from weather_columns import EPOCH_ORDINAL
+
+DAYS_IN_YEAR = 366  # Дни года в календаре високосного года
+DEFAULT_TEMP_RANGE = (15, 25)  # Комфортная средняя температура дня без выбранного типа отдыха
+RAINY_DAY_MM = 5  # День с осадками больше этого не считается хорошим
+MIN_COVERAGE = 0.5  # Окно учитывается, если данные есть хотя бы за половину дней
+
+# Номер первого дня каждого месяца в високосном году (с нуля)
+LEAP_MONTH_START = np.cumsum([0, 31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30])
+# Месяц (1..12) каждого дня года
+DAY_OF_YEAR_MONTH = np.searchsorted(LEAP_MONTH_START, np.arange(DAYS_IN_YEAR), side="right")
+
+
+def leap_day_of_year(ordinal):
+    """День года (0..365) по календарю високосного года для массива номеров дней:
+    1 марта - всегда 60, в невисокосные годы день 59 (29 февраля) просто не встречается"""
+    days = (np.asarray(ordinal, dtype=np.int64) - EPOCH_ORDINAL).astype("datetime64[D]")
+    months = days.astype("datetime64[M]")
+    month_index = months.astype(np.int64) % 12
+    return LEAP_MONTH_START[month_index] + (days - months).astype(np.int64)
+
+
+def day_of_year_label(day_of_year):
+    """Подпись дня года: 0 -> '01.01', 59 -> '29.02'"""
+    return (date(2000, 1, 1) + timedelta(days=int(day_of_year))).strftime("%d.%m")
+
+
+def parse_day_of_year(text):
+    """'15.07' -> день года по календарю високосного года"""
+    day, month = (int(part) for part in text.split("."))
+    return (date(2000, month, day) - date(2000, 1, 1)).days
+
+
+class DailySeries:
+    """Ежедневные данные всех городов, упорядоченные по городу и дате.
+    Данные города - непрерывный срез массивов (без копирования)"""
+
+    def __init__(self, df):
+        cities = pd.Categorical(df["Город"])
+        days = pd.to_datetime(df["Дата"]).to_numpy().astype("datetime64[D]").astype(np.int64)
+        ordinal = days + EPOCH_ORDINAL
+        order = np.lexsort((ordinal, cities.codes))
+
+        self.city_names = list(cities.categories)
+        self.ordinal = ordinal[order].astype(np.int32)
+        self.temp = df["Сред_температура"].to_numpy(dtype=np.float32)[order]
+        self.precip = df["Осадки_мм"].to_numpy(dtype=np.float32)[order]
+        # Границы городов: строки города i - offsets[i]:offsets[i + 1]
+        counts = np.bincount(cities.codes[order], minlength=len(self.city_names))
+        self.offsets = np.concatenate(([0], np.cumsum(counts)))
+        self._positions = {name: index for index, name in enumerate(self.city_names)}
+
+    def __contains__(self, city_name):
+        return city_name in self._positions
+
+    def city(self, city_name):
+        """Номера дней, температура и осадки города"""
+        index = self._positions[city_name]
+        rows = slice(self.offsets[index], self.offsets[index + 1])
+        return self.ordinal[rows], self.temp[rows], self.precip[rows]
+
+
+def window_scores(
+    ordinal, temp, precip, days, temp_range=DEFAULT_TEMP_RANGE, max_precip=RAINY_DAY_MM,
+    min_coverage=MIN_COVERAGE, offsets=None,
+):
+    """Оценка каждой возможной даты начала поездки на days дней.
+    Хороший день - средняя температура в temp_range и осадки не больше max_precip
+    (нет данных об осадках - день считается сухим).
+    offsets - границы городов в массивах (как у DailySeries), None - один город.
+    Возвращает массивы: номер города, номер дня начала, доля хороших дней (%),
+    средняя температура, средние осадки за день - только для окон, которые целиком
+    лежат в периоде данных города и достаточно покрыты данными"""
+    if offsets is None:
+        offsets = np.array([0, len(ordinal)])
+    offsets = np.asarray(offsets)
+    present = np.flatnonzero(offsets[1:] > offsets[:-1])  # города без данных пропускаем
+    firsts = ordinal[offsets[present]].astype(np.int64)
+    lengths = ordinal[offsets[present + 1] - 1].astype(np.int64) - firsts + 1
+
+    # Непрерывные ряды городов друг за другом (от первого до последнего дня), пропуски - NaN
+    block_starts = np.concatenate(([0], np.cumsum(lengths)))
+    rows_city = np.repeat(np.arange(len(present)), np.diff(offsets)[present])
+    positions = block_starts[rows_city] + ordinal - firsts[rows_city]
+    series_temp = np.full(block_starts[-1], np.nan)
+    series_precip = np.full(block_starts[-1], np.nan)
+    series_temp[positions] = temp
+    series_precip[positions] = precip
+
+    has_temp = ~np.isnan(series_temp)
+    has_precip = ~np.isnan(series_precip)
+    dry = ~has_precip | (series_precip <= max_precip)
+    good = has_temp & (series_temp >= temp_range[0]) & (series_temp <= temp_range[1]) & dry
+
+    def window_sum(values):
+        # Сумма по каждому окну из days дней: разность накопленных сумм
+        cumulative = np.concatenate(([0.0], np.cumsum(values, dtype=np.float64)))
+        return cumulative[days:] - cumulative[:-days]
+
+    if len(series_temp) < days:
+        empty = np.zeros(0)
+        return empty.astype(np.int64), empty.astype(np.int64), empty, empty, empty
+
+    temp_days = window_sum(has_temp)
+    precip_days = window_sum(has_precip)
+
+    # Окно не должно заходить в ряд следующего города
+    window_city = np.repeat(np.arange(len(present)), lengths)[: len(temp_days)]
+    local_start = np.arange(len(temp_days)) - block_starts[window_city]
+    valid = (local_start <= lengths[window_city] - days) & (temp_days >= min_coverage * days)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        score = 100 * window_sum(good) / temp_days
+        mean_temp = window_sum(np.where(has_temp, series_temp, 0)) / temp_days
+        mean_precip = window_sum(np.where(has_precip, series_precip, 0)) / precip_days
+
+    city = window_city[valid]
+    starts = firsts[city] + local_start[valid]
+    return present[city], starts, score[valid], mean_temp[valid], mean_precip[valid]
+
+
+def scores_by_day_of_year(city, starts, score, mean_temp, mean_precip, cities=1):
+    """Средние по годам оценки для каждого города и дня года начала поездки
+    (массивы формы [город, 366]): оценка, худший год, температура, осадки
+    и число лет с данными"""
+    starts = np.asarray(starts, dtype=np.int64)
+    # День года считаем один раз на каждую дату периода, а не для каждого окна
+    first = starts.min() if len(starts) else 0
+    last = starts.max() if len(starts) else -1
+    day_of_year = leap_day_of_year(np.arange(first, last + 1))[starts - first]
+    cell = np.asarray(city, dtype=np.int64) * DAYS_IN_YEAR + day_of_year
+    size = cities * DAYS_IN_YEAR
+    shape = (cities, DAYS_IN_YEAR)
+    years = np.bincount(cell, minlength=size)
+
+    def mean(values):
+        total = np.bincount(cell, weights=np.nan_to_num(values), minlength=size)
+        count = np.bincount(cell, weights=~np.isnan(values), minlength=size)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return (total / count).reshape(shape)
+
+    worst = np.full(size, np.inf)
+    np.minimum.at(worst, cell, score)
+    worst[years == 0] = np.nan
+    return mean(score), worst.reshape(shape), mean(mean_temp), mean(mean_precip), years.reshape(shape)
+
+
+def default_min_years(years):
+    """Сколько лет данных нужно для дня года: половина от максимума,
+    чтобы 29 февраля не выигрывало за счет одного удачного года"""
+    return max(1, int(years.max(initial=0)) // 2)
+
+
+def starts_table(day_of_year, days, score, worst, mean_temp, mean_precip, years):
+    """Таблица дней начала поездки (значения уже выбраны для этих дней)"""
+    return pd.DataFrame({
+        "Начало": [day_of_year_label(day) for day in day_of_year],
+        "День года": np.asarray(day_of_year, dtype=np.int64) + 1,
+        "Дней": days,
+        "Оценка, %": np.round(score, 1),
+        "Худший год, %": np.round(worst, 1),
+        "Средняя температура": np.round(mean_temp, 1),
+        "Осадки (мм/день)": np.round(mean_precip, 1),
+        "Лет": years,
+    })
+
+
+def ranked_starts(
+    score, worst, mean_temp, mean_precip, years, days, top=10, min_years=None, suitable_only=True,
+):
+    """Таблица лучших дней начала поездки в одном городе (массивы длиной 366):
+    выше средняя оценка, затем - худший год. top - сколько дней (None - все),
+    min_years - сколько лет данных нужно для дня года (по умолчанию - default_min_years),
+    suitable_only - только дни с оценкой больше 0 (ни одного хорошего дня - не подходит)"""
+    if min_years is None:
+        min_years = default_min_years(years)
+    candidates = years >= min_years
+    if suitable_only:
+        candidates &= score > 0
+    candidates = np.flatnonzero(candidates)
+    order = candidates[np.lexsort((candidates, -worst[candidates], -score[candidates]))]
+    if top is not None:
+        order = order[:max(top, 0)]
+    return starts_table(
+        order, days, score[order], worst[order], mean_temp[order], mean_precip[order], years[order]
+    )
+
+
+def top_windows(score, worst, years, top=10, min_years=None, per_city=None):
+    """Лучшие пары (город, день начала) по матрицам [город, 366].
+    Из каждого города берется не больше top (или per_city) лучших дней, и они проходят
+    через кучу размером top - общий список кандидатов по всем городам не собирается
+    и не сортируется. top - как в ranked_starts (None - все пары); пары с оценкой 0
+    не подходят и не берутся.
+    Возвращает [(город, день года)] от лучшей пары"""
+    if min_years is None:
+        min_years = default_min_years(years)
+    eligible = (years >= min_years) & (score > 0)
+    if top is None:
+        top = int(eligible.sum())  # полный рейтинг
+    if top <= 0:
+        return []
+    per_city = top if per_city is None else min(per_city, top)
+    heap = []  # (оценка, худший год, -город, -день): в корне - худшая из отобранных пар
+
+    for city in range(score.shape[0]):
+        candidates = np.flatnonzero(eligible[city])
+        if len(candidates) == 0:
+            continue
+        city_score = score[city, candidates]
+        if len(heap) == top and city_score.max() < heap[0][0]:
+            continue  # в городе нет дней лучше уже отобранных
+        # Лучшие дни города - тот же порядок, что и в ranked_starts
+        city_worst = worst[city, candidates]
+        best = candidates[np.lexsort((candidates, -city_worst, -city_score))[:per_city]]
+        for day in best:
+            entry = (score[city, day], worst[city, day], -city, -int(day))
+            if len(heap) < top:
+                heapq.heappush(heap, entry)
+            elif entry > heap[0]:
+                heapq.heappushpop(heap, entry)
+            else:
+                break  # остальные дни города еще хуже
+
+    # При равных оценках выше - лучший худший год, затем - раньше по каталогу и по году
+    return [(-entry[2], -entry[3]) for entry in sorted(heap, reverse=True)]
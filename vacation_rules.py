@@ -0,0 +1,105 @@
+"""Правила типов отдыха, заданные данными (vacation_rules.json).
+Каждое правило - диапазоны температуры, осадков и ветра и список подходящих месяцев.
+Правила "компилируются" в массивы границ и маску месяцев, поэтому проверка всех правил
+для любых массивов значений (город × месяц, список событий) - одна векторная операция.
+Новый тип отдыха добавляется записью в JSON, без изменения кода"""
+import os  # Для пути к файлу правил
+import json  # Для чтения правил
+
+import numpy as np  # Для векторной проверки правил
+
+RULES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "vacation_rules.json")
+
+# Какие значения можно ограничить в правиле: ключ в JSON -> аргумент evaluate
+FEATURES = ("temp", "precip", "wind")
+
+MONTH_NAMES = [
+    "январь", "февраль", "март", "апрель", "май", "июнь",
+    "июль", "август", "сентябрь", "октябрь", "ноябрь", "декабрь",
+]
+
+
+class VacationRules:
+    """Скомпилированные правила: границы по каждому значению и маска месяцев"""
+
+    def __init__(self, rules):
+        self.types = rules["types"]
+        self.names = [rule["name"] for rule in self.types]
+        self.short_names = [rule.get("short_name", rule["name"]) for rule in self.types]
+        self.default_name = rules["default"]["name"]
+        self.default_short_name = rules["default"].get("short_name", self.default_name)
+
+        # Границы [тип]; у правил без ограничения по значению - проверка пропускается
+        self.bounds = {}
+        for feature in FEATURES:
+            limits = [rule.get(feature) for rule in self.types]
+            self.bounds[feature] = (
+                np.array([limit is not None for limit in limits]),
+                np.array([limit[0] if limit else -np.inf for limit in limits], dtype=float),
+                np.array([limit[1] if limit else np.inf for limit in limits], dtype=float),
+            )
+
+        # Маска месяцев [месяц, тип]: строка 0 не используется, месяцы - с 1 по 12
+        self.month_mask = np.zeros((13, len(self.types)), dtype=bool)
+        for index, rule in enumerate(self.types):
+            self.month_mask[rule["months"], index] = True
+
+    def __len__(self):
+        return len(self.types)
+
+    def evaluate(self, temp, month, precip=None, wind=None):
+        """Подходит ли каждый тип отдыха: массив формы (входные данные..., число типов).
+        Массивы значений и месяцев согласуются по правилам broadcasting numpy.
+        Значение None - не проверяется; NaN не проходит ограничение по этому значению.
+        Месяцы - от 1 до 12, иначе ValueError"""
+        values = {"temp": temp, "precip": precip, "wind": wind}
+        month = np.asarray(month, dtype=np.int64)
+        if month.size and (month.min() < 1 or month.max() > 12):
+            raise ValueError("❌ Номер месяца должен быть от 1 до 12")
+        result = self.month_mask[month]
+        for feature in FEATURES:
+            if values[feature] is None:
+                continue
+            constrained, low, high = self.bounds[feature]
+            value = np.asarray(values[feature], dtype=float)[..., np.newaxis]
+            result = result & (~constrained | ((value >= low) & (value <= high)))
+        return result
+
+    def first_match(self, temp, month, precip=None, wind=None):
+        """Номер первого подходящего типа (правила проверяются по порядку), -1 - ни одного"""
+        matches = self.evaluate(temp, month, precip, wind)
+        return np.where(matches.any(axis=-1), matches.argmax(axis=-1), -1)
+
+    def type_name(self, temp, month, short=False):
+        """Название типа отдыха для одного значения температуры и месяца"""
+        if temp is not None:
+            index = int(self.first_match(temp, month))
+            if index >= 0:
+                return (self.short_names if short else self.names)[index]
+        return self.default_short_name if short else self.default_name
+
+    def season(self, name):
+        """Подходящие месяцы типа отдыха текстом: 'июнь-август' или список месяцев"""
+        rule = self.types[self.names.index(name)]
+        return rule.get("season") or ", ".join(MONTH_NAMES[month - 1] for month in rule["months"])
+
+    def describe(self, short=False, separator=" — "):
+        """Строки описания типов: '🏖️ Пляжный (20-32°C) — июнь-август'
+        (у правила без ограничения температуры диапазон не пишется)"""
+        names = self.short_names if short else self.names
+        lines = []
+        for name, rule in zip(names, self.types):
+            title = name
+            if rule.get("temp"):
+                low, high = rule["temp"]
+                # Для отрицательных температур дефис неоднозначен: -10...-2
+                temp_range = f"{low}...{high}" if min(low, high) < 0 else f"{low}-{high}"
+                title = f"{name} ({temp_range}°C)"
+            lines.append(f"{title}{separator}{self.season(rule['name'])}")
+        return lines
+
+
+def load_vacation_rules(path=RULES_FILE):
+    """Читает и компилирует правила типов отдыха"""
+    with open(path, encoding="utf-8") as f:
+        return VacationRules(json.load(f))
@@ -0,0 +1,127 @@
+"""Колоночный накопитель ежедневных погодных данных.
+Вместо списка словарей (по словарю на день) данные хранятся в типизированных массивах:
+код города (int32), номер дня (date.toordinal(), int32) и метеопараметры (float32, NaN - нет данных).
+Массивы растут блоками и отдаются в numpy/pandas без копирования"""
+import numpy as np  # Для типизированных массивов
+import pandas as pd  # Для выдачи таблицы
+
+from weather_extract import VALUE_COLUMNS
+
+# date(1970, 1, 1).toordinal() - для перевода номера дня в datetime64
+EPOCH_ORDINAL = 719163
+
+
+class ColumnarWeatherBuffer:
+    """Накопитель ежедневных данных по колонкам"""
+
+    CHUNK_ROWS = 16384  # Минимальный шаг роста массивов
+
+    def __init__(self, chunk_rows=CHUNK_ROWS):
+        self.chunk_rows = chunk_rows
+        self.city_names = []  # код города -> название
+        self._city_codes = {}  # название -> код города
+        self._size = 0  # сколько строк заполнено
+        self.city = np.empty(0, dtype=np.int32)
+        self.ordinal = np.empty(0, dtype=np.int32)
+        self.values = {name: np.empty(0, dtype=np.float32) for name in VALUE_COLUMNS}
+
+    def __len__(self):
+        return self._size
+
+    def city_code(self, city_name):
+        """Код города (новый город получает следующий номер)"""
+        code = self._city_codes.get(city_name)
+        if code is None:
+            code = len(self.city_names)
+            self._city_codes[city_name] = code
+            self.city_names.append(city_name)
+        return code
+
+    def _reserve(self, extra_rows):
+        """Гарантирует место еще под extra_rows строк"""
+        needed = self._size + extra_rows
+        capacity = len(self.city)
+        if needed <= capacity:
+            return
+        # Растем блоками, но не меньше чем в полтора раза - чтобы добавление было в среднем O(1)
+        new_capacity = max(needed, capacity + max(self.chunk_rows, capacity // 2))
+        new_capacity = -(-new_capacity // self.chunk_rows) * self.chunk_rows
+
+        def grow(array):
+            grown = np.empty(new_capacity, dtype=array.dtype)
+            grown[: self._size] = array[: self._size]
+            return grown
+
+        self.city = grow(self.city)
+        self.ordinal = grow(self.ordinal)
+        self.values = {name: grow(array) for name, array in self.values.items()}
+
+    def append_columns(self, city_name, dates, columns):
+        """Добавляет данные одной страницы: dates - список date (или номера дней),
+        columns - словарь массивов по VALUE_COLUMNS. Возвращает число добавленных строк"""
+        count = len(dates)
+        if count == 0:
+            return 0
+        self._reserve(count)
+        start, end = self._size, self._size + count
+
+        self.city[start:end] = self.city_code(city_name)
+        if isinstance(dates, np.ndarray):
+            self.ordinal[start:end] = dates
+        else:
+            self.ordinal[start:end] = [day.toordinal() for day in dates]
+        for name in VALUE_COLUMNS:
+            self.values[name][start:end] = columns[name]
+
+        self._size = end
+        return count
+
+    def append_frame(self, df):
+        """Добавляет таблицу с колонками Город, Дата и метеопараметрами
+        (например, прочитанную из ранее сохраненного CSV)"""
+        count = len(df)
+        if count == 0:
+            return 0
+        self._reserve(count)
+        start, end = self._size, self._size + count
+
+        cities = pd.Categorical(df["Город"])
+        codes = np.array([self.city_code(name) for name in cities.categories], dtype=np.int32)
+        self.city[start:end] = codes[cities.codes]
+
+        days = pd.to_datetime(df["Дата"]).to_numpy().astype("datetime64[D]").astype(np.int64)
+        self.ordinal[start:end] = days + EPOCH_ORDINAL
+        for name in VALUE_COLUMNS:
+            self.values[name][start:end] = pd.to_numeric(df[name], errors="coerce")
+
+        self._size = end
+        return count
+
+    def columns(self, start=0):
+        """Заполненная часть массивов (представления, без копирования)"""
+        end = self._size
+        result = {"city": self.city[start:end], "ordinal": self.ordinal[start:end]}
+        for name in VALUE_COLUMNS:
+            result[name] = self.values[name][start:end]
+        return result
+
+    def to_dataframe(self, start=0):
+        """Таблица в прежнем формате колонок (Город, Дата, Год, Месяц, День, ...).
+        Метеопараметры передаются в pandas без копирования, город - категорией по кодам"""
+        columns = self.columns(start)
+        dates = pd.DatetimeIndex(
+            (columns["ordinal"] - EPOCH_ORDINAL).astype("datetime64[D]")
+        )
+        data = {
+            # Категории по алфавиту, чтобы сортировка по городу была как у строк
+            "Город": pd.Categorical.from_codes(
+                columns["city"], categories=self.city_names
+            ).reorder_categories(sorted(self.city_names)),
+            "Дата": dates,
+            "Год": dates.year.astype(np.int16),
+            "Месяц": dates.month.astype(np.int8),
+            "День": dates.day.astype(np.int8),
+        }
+        for name in VALUE_COLUMNS:
+            data[name] = columns[name]
+        return pd.DataFrame(data, copy=False)
@@ -0,0 +1,139 @@
+"""Извлечение таблицы с погодой из HTML-страницы архива.
+Два движка с одинаковым результатом:
+  "fast" - потоковый разбор регулярными выражениями, без построения DOM-дерева;
+  "bs4"  - прежний разбор через BeautifulSoup (запасной вариант).
+Результат - словарь колонок: "Дата" (список datetime.date) и массивы numpy с метеопараметрами
+(NaN там, где значения нет)"""
+import re  # Для потокового разбора HTML
+import math  # Для NaN
+import html as html_lib  # Для раскодирования &nbsp; и других сущностей
+from datetime import date, datetime  # Для работы с датами
+
+import numpy as np  # Для колонок-массивов
+from bs4 import BeautifulSoup  # Для запасного движка
+
+# Колонки таблицы после даты, в порядке следования на странице
+VALUE_COLUMNS = [
+    "Макс_температура",
+    "Мин_температура",
+    "Сред_температура",
+    "Давление_гПа",
+    "Скорость_ветра_мс",
+    "Осадки_мм",
+]
+
+# Строка таблицы: от <tr> до следующего <tr> или конца таблицы (закрывающий </tr> необязателен)
+_ROW_RE = re.compile(r"<tr\b[^>]*>(.*?)(?=<tr\b|</table\b|\Z)", re.S | re.I)
+# Ячейка данных: от <td> до следующей ячейки или конца строки
+_CELL_RE = re.compile(r"<td\b[^>]*>(.*?)(?=<t[dh]\b|</tr\b|\Z)", re.S | re.I)
+_TAG_RE = re.compile(r"<[^>]*>")
+
+
+def parse_float_value(value_str):
+    """Строка -> число (запятая допускается как разделитель), NaN если не удается"""
+    value_str = value_str.strip()
+    if not value_str:
+        return math.nan
+    try:
+        return float(value_str.replace(",", "."))
+    except ValueError:
+        return math.nan
+
+
+def _cell_text(cell):
+    """Текст ячейки без вложенных тегов и HTML-сущностей"""
+    if "<" in cell:
+        cell = _TAG_RE.sub("", cell)
+    if "&" in cell:
+        cell = html_lib.unescape(cell)
+    return cell.strip()
+
+
+def _parse_date(date_str):
+    """'15.01.2024' -> date(2024, 1, 15); быстрее, чем datetime.strptime"""
+    day, month, year = date_str.split(".")
+    return date(int(year), int(month), int(day))
+
+
+def _to_columns(dates, values):
+    """Собирает результат из списка дат и списков значений по колонкам"""
+    columns = {"Дата": dates}
+    for name, column in zip(VALUE_COLUMNS, values):
+        columns[name] = np.array(column, dtype=np.float64)
+    return columns
+
+
+def extract_table_fast(html):
+    """Потоковый разбор первой таблицы страницы без построения DOM.
+    Возвращает словарь колонок или None, если таблицы нет"""
+    lower = html.lower()
+    table_start = lower.find("<table")
+    if table_start < 0:
+        return None
+    table_end = lower.find("</table", table_start)
+    table = html[table_start : table_end if table_end >= 0 else len(html)]
+
+    dates = []
+    values = [[] for _ in VALUE_COLUMNS]
+    rows = _ROW_RE.finditer(table)
+    next(rows, None)  # Пропускаем заголовок
+
+    for row in rows:
+        cells = _CELL_RE.findall(row.group(1))
+        if not cells:
+            continue
+        try:
+            day = _parse_date(_cell_text(cells[0]))
+        except ValueError:
+            continue  # Строка без корректной даты
+
+        dates.append(day)
+        for i, column in enumerate(values, start=1):
+            column.append(parse_float_value(_cell_text(cells[i])) if len(cells) > i else math.nan)
+
+    return _to_columns(dates, values)
+
+
+def extract_table_bs4(html):
+    """Разбор через полное дерево BeautifulSoup (прежний способ).
+    Возвращает словарь колонок или None, если таблицы нет"""
+    soup = BeautifulSoup(html, "html.parser")
+    table = soup.find("table")
+    if not table:
+        return None
+
+    dates = []
+    values = [[] for _ in VALUE_COLUMNS]
+    for row in table.find_all("tr")[1:]:  # Пропускаем заголовок
+        cols = row.find_all("td")
+        if len(cols) < 1:
+            continue
+        try:
+            day = datetime.strptime(cols[0].text.strip(), "%d.%m.%Y").date()
+        except ValueError:
+            continue
+
+        dates.append(day)
+        for i, column in enumerate(values, start=1):
+            column.append(parse_float_value(cols[i].text) if len(cols) > i else math.nan)
+
+    return _to_columns(dates, values)
+
+
+# Доступные движки разбора
+ENGINES = {
+    "fast": extract_table_fast,
+    "bs4": extract_table_bs4,
+}
+
+
+def extract_table(html, engine="fast"):
+    """Извлекает таблицу выбранным движком.
+    Если быстрый движок не справился со страницей, повторяем разбор через BeautifulSoup"""
+    try:
+        columns = ENGINES[engine](html)
+    except Exception:
+        columns = None
+    if columns is None and engine != "bs4":
+        columns = extract_table_bs4(html)
+    return columns
@@ -0,0 +1,357 @@
+"""Асинхронная загрузка страниц архива погоды (httpx + ограничение частоты запросов).
+Кэш страниц на диске, повторы с экспоненциальной задержкой, автоматический
+выключатель (circuit breaker) для падающего хоста/станции и замеры каждой попытки"""
+import os  # Для работы с файлами кэша
+import csv  # Для выгрузки замеров
+import gzip  # Для сжатия страниц в кэше
+import json  # Для построения ключа кэша
+import time  # Для отсчета интервалов между запросами
+import asyncio  # Для асинхронных пауз
+import random  # Для случайной добавки к задержке между повторами
+import hashlib  # Для ключа кэша по содержимому запроса
+from datetime import datetime, timedelta  # Для проверки "свежести" диапазона дат
+from urllib.parse import urlsplit  # Для выделения хоста из ссылки
+
+import httpx  # Асинхронный HTTP-клиент
+
+
+class HostRateLimiter:
+    """Ограничивает частоту запросов к каждому хосту (не чаще requests_per_second в секунду)"""
+
+    def __init__(self, requests_per_second=0.5):
+        # Минимальный интервал между запросами к одному хосту
+        self.interval = 1.0 / requests_per_second if requests_per_second > 0 else 0.0
+        self._next_slot = {}  # хост -> момент, раньше которого следующий запрос не отправляем
+
+    async def wait(self, url):
+        """Ждет, пока для хоста из url освободится очередной слот"""
+        host = urlsplit(url).netloc
+        now = time.monotonic()
+        # Резервируем слот сразу (до await), поэтому параллельные задачи не получат один и тот же
+        slot = max(now, self._next_slot.get(host, now))
+        self._next_slot[host] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class CacheMiss(Exception):
+    """Страницы нет в кэше, а сеть запрещена (режим воспроизведения)"""
+
+
+class ResponseCache:
+    """Кэш ответов архива на диске.
+    Ключ - хэш адреса и параметров запроса (станция + диапазон дат), страницы хранятся в gzip.
+    Исторические диапазоны не меняются и хранятся бессрочно, диапазоны, захватывающие
+    последние recent_days дней, считаются устаревшими через recent_ttl_hours часов.
+    При превышении max_bytes удаляются давно не использованные файлы (LRU по atime)"""
+
+    def __init__(
+        self,
+        cache_dir=".weather_cache",
+        max_bytes=500 * 1024 * 1024,
+        recent_days=7,
+        recent_ttl_hours=24,
+    ):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.recent_days = recent_days
+        self.recent_ttl = recent_ttl_hours * 3600
+        self._total_bytes = None  # размер кэша, считаем один раз при первой записи
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, url, params):
+        """Хэш запроса: одинаковые станция и даты дают одинаковый ключ"""
+        raw = json.dumps([url, sorted(params.items())], ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        # Раскладываем по подпапкам, чтобы в одной папке не было тысяч файлов
+        return os.path.join(self.cache_dir, key[:2], key + ".html.gz")
+
+    def _is_recent(self, params):
+        """Захватывает ли диапазон последние дни (такие данные еще могут дополниться)"""
+        try:
+            end = datetime.strptime(params["datepicker_end"], "%d.%m.%Y")
+        except (KeyError, ValueError):
+            return True  # неизвестный формат - не доверяем кэшу надолго
+        return end >= datetime.now() - timedelta(days=self.recent_days)
+
+    def get(self, url, params):
+        """Возвращает HTML из кэша или None"""
+        path = self._path(self.key(url, params))
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+
+        if self._is_recent(params) and time.time() - stat.st_mtime > self.recent_ttl:
+            self.misses += 1
+            return None
+
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            html = f.read()
+        # Отмечаем использование для LRU (mtime не трогаем - по нему считается срок годности)
+        os.utime(path, (time.time(), stat.st_mtime))
+        self.hits += 1
+        return html
+
+    def put(self, url, params, html):
+        """Сохраняет страницу в кэш и при необходимости вытесняет старые"""
+        path = self._path(self.key(url, params))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            f.write(html)
+        os.replace(tmp_path, path)  # атомарная замена, без полузаписанных файлов
+
+        if self._total_bytes is None:
+            self._total_bytes = sum(size for _, _, size in self._entries())
+        else:
+            self._total_bytes += os.path.getsize(path)
+        if self._total_bytes > self.max_bytes:
+            self.evict()
+
+    def _entries(self):
+        """Все файлы кэша: (время последнего использования, путь, размер)"""
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith(".html.gz"):
+                    path = os.path.join(root, name)
+                    stat = os.stat(path)
+                    yield stat.st_atime, path, stat.st_size
+
+    def evict(self):
+        """Удаляет давно не использованные страницы, пока кэш не уложится в 90% лимита"""
+        entries = sorted(self._entries())
+        total = sum(size for _, _, size in entries)
+        target = self.max_bytes * 0.9
+        for _, path, size in entries:
+            if total <= target:
+                break
+            os.remove(path)
+            total -= size
+        self._total_bytes = total
+
+
+class CircuitOpen(Exception):
+    """Выключатель разомкнут: хост или станция недавно подряд отвечали ошибками"""
+
+
+class RetryPolicy:
+    """Повторы с экспоненциальной задержкой и случайной добавкой (full jitter)"""
+
+    def __init__(self, max_attempts=4, base_delay=1.0, max_delay=30.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt):
+        """Пауза перед повтором номер attempt (1, 2, ...): случайная от 0 до base*2^attempt"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    @staticmethod
+    def is_retryable(error):
+        """Повторяем сетевые ошибки, таймауты, 429 и 5xx; прочие 4xx - бессмысленно"""
+        if isinstance(error, httpx.HTTPStatusError):
+            status = error.response.status_code
+            return status == 429 or status >= 500
+        return isinstance(error, httpx.TransportError)
+
+
+class CircuitBreaker:
+    """Автоматический выключатель: после failure_threshold ошибок подряд перестает
+    пропускать запросы на reset_timeout секунд, затем пропускает один пробный.
+    Пока пробный запрос не завершился (полуоткрытое состояние), остальные ждут его итога"""
+
+    def __init__(self, failure_threshold=5, reset_timeout=60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0  # ошибок подряд
+        self.opened_at = None  # когда выключатель разомкнулся
+        self.probing = False  # пробный запрос уже выдан и еще не завершился
+
+    def allow(self):
+        """Можно ли сейчас отправить запрос. После паузы разрешение получает только
+        первый вызвавший (пробный запрос), остальные - нет до record_success/record_failure"""
+        if self.opened_at is None:
+            return True
+        if self.probing:
+            return False
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.probing = True
+            return True
+        return False
+
+    def release(self):
+        """Пробный запрос так и не был отправлен - пробовать может следующий"""
+        self.probing = False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        # Неудачный пробный запрос сразу размыкает выключатель снова
+        if self.probing or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+        self.probing = False
+
+
+class FetchMetrics:
+    """Замеры каждой попытки загрузки: станция, диапазон, номер попытки, итог, время"""
+
+    def __init__(self):
+        self.attempts = []
+
+    def record(self, station, params, attempt, outcome, latency):
+        self.attempts.append(
+            {
+                "Станция": station,
+                "Начало": params.get("datepicker_beg"),
+                "Конец": params.get("datepicker_end"),
+                "Попытка": attempt,
+                "Итог": outcome,
+                "Время_с": round(latency, 3),
+            }
+        )
+
+    def summary(self):
+        """Печатает сводку: число попыток, успехов, повторов и задержки"""
+        if not self.attempts:
+            return
+        latencies = sorted(item["Время_с"] for item in self.attempts)
+        ok = sum(item["Итог"] == "ok" for item in self.attempts)
+        retries = sum(item["Попытка"] > 1 for item in self.attempts)
+
+        def percentile(share):
+            return latencies[min(len(latencies) - 1, int(share * len(latencies)))]
+
+        print(
+            f"📶 Запросов: {len(self.attempts)}, успешно: {ok}, повторов: {retries}; "
+            f"время p50 {percentile(0.5):.2f} с, p95 {percentile(0.95):.2f} с, "
+            f"max {latencies[-1]:.2f} с"
+        )
+
+    def save(self, path):
+        """Сохраняет все попытки в CSV"""
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(
+                f, fieldnames=["Станция", "Начало", "Конец", "Попытка", "Итог", "Время_с"]
+            )
+            writer.writeheader()
+            writer.writerows(self.attempts)
+
+
+class ResilientFetcher:
+    """Загрузка страниц архива: кэш -> выключатели -> лимит частоты -> запрос с повторами"""
+
+    def __init__(
+        self,
+        cache=None,
+        offline=False,
+        limiter=None,
+        retry=None,
+        host_failure_threshold=10,
+        station_failure_threshold=3,
+        reset_timeout=60.0,
+        timeout=30,
+    ):
+        self.cache = cache
+        self.offline = offline
+        self.limiter = limiter or HostRateLimiter()
+        self.retry = retry or RetryPolicy()
+        self.timeout = timeout
+        self.metrics = FetchMetrics()
+        self._breaker_settings = {
+            "host": host_failure_threshold,
+            "station": station_failure_threshold,
+        }
+        self.reset_timeout = reset_timeout
+        self.breakers = {}  # ("host", хост) / ("station", код) -> CircuitBreaker
+
+    def _breaker(self, kind, key):
+        breaker = self.breakers.get((kind, key))
+        if breaker is None:
+            breaker = CircuitBreaker(self._breaker_settings[kind], self.reset_timeout)
+            self.breakers[(kind, key)] = breaker
+        return breaker
+
+    async def fetch(self, client, url, params, headers):
+        """Возвращает HTML страницы. Исключения: CacheMiss (нет в кэше при offline),
+        CircuitOpen (хост/станция временно отключены), httpx.HTTPError (все попытки неудачны)"""
+        if self.cache is not None:
+            html = self.cache.get(url, params)
+            if html is not None:
+                return html  # из кэша - без сети и без ожидания лимита
+        if self.offline:
+            raise CacheMiss(f"нет в кэше: {params}")
+
+        station = params.get("station")
+        # Хост считает каждую неудачную попытку, станция - только запросы, исчерпавшие повторы
+        host_breaker = self._breaker("host", urlsplit(url).netloc)
+        station_breaker = self._breaker("station", station)
+
+        # Станция проверяется один раз на весь запрос (ее итог - после всех повторов),
+        # хост - перед каждой попыткой
+        if not station_breaker.allow():
+            raise CircuitOpen(f"запросы временно приостановлены (станция {station})")
+        station_probe = station_breaker.probing  # этот запрос - пробный для станции
+        station_recorded = False
+
+        try:
+            attempt = 0
+            while True:
+                attempt += 1
+                if not host_breaker.allow():
+                    raise CircuitOpen(
+                        f"запросы временно приостановлены (хост {urlsplit(url).netloc})"
+                    )
+                host_probe = host_breaker.probing
+                host_recorded = False
+
+                try:
+                    await self.limiter.wait(url)
+                    started = time.monotonic()
+                    try:
+                        response = await client.get(
+                            url, params=params, headers=headers, timeout=self.timeout
+                        )
+                        response.raise_for_status()  # HTTP-ошибки (4xx/5xx) превращаем в исключение
+                    except httpx.HTTPError as e:
+                        outcome = (
+                            f"http {e.response.status_code}"
+                            if isinstance(e, httpx.HTTPStatusError)
+                            else type(e).__name__
+                        )
+                        self.metrics.record(
+                            station, params, attempt, outcome, time.monotonic() - started
+                        )
+                        host_breaker.record_failure()
+                        host_recorded = True
+                        if attempt >= self.retry.max_attempts or not self.retry.is_retryable(e):
+                            station_breaker.record_failure()
+                            station_recorded = True
+                            raise
+                        await asyncio.sleep(self.retry.delay(attempt))
+                        continue
+
+                    self.metrics.record(station, params, attempt, "ok", time.monotonic() - started)
+                    host_breaker.record_success()
+                    host_recorded = True
+                    station_breaker.record_success()
+                    station_recorded = True
+                finally:
+                    # Попытка прервана (отмена задачи и т.п.) - пробное разрешение возвращаем
+                    if host_probe and not host_recorded:
+                        host_breaker.release()
+
+                if self.cache is not None:
+                    self.cache.put(url, params, response.text)
+                return response.text
+        finally:
+            if station_probe and not station_recorded:
+                station_breaker.release()
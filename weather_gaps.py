@@ -0,0 +1,112 @@
+"""Поиск пропущенных дней в ежедневных данных без циклов по записям.
+Даты представлены целыми номерами дней (date.toordinal()), города - целыми кодами,
+поэтому пропуски находятся разностью соседних номеров после одной сортировки"""
+from datetime import date  # Для перевода номеров дней в даты
+
+import numpy as np  # Для векторных вычислений
+import pandas as pd  # Для таблицы с результатом
+
+
+def find_gap_ranges(city, ordinal, starts=None, ends=None):
+    """Находит непрерывные диапазоны пропущенных дней по каждому городу.
+    city - коды городов, ordinal - номера дней (в любом порядке, повторы допускаются).
+    starts / ends - ожидаемые первый и последний день периода по коду города
+    (массивы длиной в число городов). Без них проверяется промежуток между
+    первым и последним наблюдением каждого города.
+    Возвращает три массива: код города, первый и последний пропущенный день"""
+    city = np.asarray(city, dtype=np.int64)
+    ordinal = np.asarray(ordinal, dtype=np.int64)
+
+    # Один ключ "город, день" - сортировать одномерный массив быстрее, чем lexsort
+    key = (city << 32) | ordinal
+    if len(key) > 1 and not (key[1:] >= key[:-1]).all():  # данные обычно уже упорядочены
+        key = np.sort(key)
+    if len(key) > 1:
+        key = key[np.concatenate(([True], key[1:] != key[:-1]))]  # убираем повторы
+    city = key >> 32
+    ordinal = key & 0xFFFFFFFF
+
+    if starts is not None:
+        starts = np.asarray(starts, dtype=np.int64)
+        ends = np.asarray(ends, dtype=np.int64)
+        inside = (ordinal >= starts[city]) & (ordinal <= ends[city])  # наблюдения вне периода не нужны
+        city, ordinal = city[inside], ordinal[inside]
+
+    # Пропуски внутри ряда: соседние дни одного города отстоят больше чем на 1
+    same_city = city[1:] == city[:-1]
+    inner = same_city & (ordinal[1:] - ordinal[:-1] > 1)
+    gap_city = [city[1:][inner]]
+    gap_start = [ordinal[:-1][inner] + 1]
+    gap_end = [ordinal[1:][inner] - 1]
+
+    if starts is not None:
+        is_first = np.concatenate(([True], ~same_city)) if len(city) else np.zeros(0, bool)
+        is_last = np.concatenate((~same_city, [True])) if len(city) else np.zeros(0, bool)
+
+        # Пропуск в начале периода
+        first_city, first_day = city[is_first], ordinal[is_first]
+        lead = first_day > starts[first_city]
+        gap_city.append(first_city[lead])
+        gap_start.append(starts[first_city[lead]])
+        gap_end.append(first_day[lead] - 1)
+
+        # Пропуск в конце периода
+        last_city, last_day = city[is_last], ordinal[is_last]
+        tail = last_day < ends[last_city]
+        gap_city.append(last_city[tail])
+        gap_start.append(last_day[tail] + 1)
+        gap_end.append(ends[last_city[tail]])
+
+        # Города, по которым нет ни одного дня, - пропущен весь период
+        absent = np.setdiff1d(np.arange(len(starts)), first_city)
+        absent = absent[starts[absent] <= ends[absent]]
+        gap_city.append(absent)
+        gap_start.append(starts[absent])
+        gap_end.append(ends[absent])
+
+    gap_city = np.concatenate(gap_city)
+    gap_start = np.concatenate(gap_start)
+    gap_end = np.concatenate(gap_end)
+    order = np.lexsort((gap_start, gap_city))
+    return gap_city[order], gap_start[order], gap_end[order]
+
+
+def merge_ranges(ranges):
+    """Объединяет пересекающиеся и соседние диапазоны (начало, конец) номеров дней.
+    Возвращает отсортированный список без пересечений"""
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def subtract_ranges(start, end, ranges):
+    """Части диапазона [start, end], не покрытые ranges (список без пересечений,
+    по возрастанию - как из merge_ranges). Возвращает список (начало, конец)"""
+    parts = []
+    for skip_start, skip_end in ranges:
+        if skip_end < start:
+            continue
+        if skip_start > end:
+            break
+        if skip_start > start:
+            parts.append((start, skip_start - 1))
+        start = skip_end + 1
+    if start <= end:
+        parts.append((start, end))
+    return parts
+
+
+def gap_ranges_frame(city_names, gap_city, gap_start, gap_end):
+    """Таблица пропусков: Город, Начало, Конец, Дней"""
+    return pd.DataFrame(
+        {
+            "Город": [city_names[code] for code in gap_city],
+            "Начало": [date.fromordinal(int(day)) for day in gap_start],
+            "Конец": [date.fromordinal(int(day)) for day in gap_end],
+            "Дней": (gap_end - gap_start + 1).astype(np.int64),
+        }
+    )
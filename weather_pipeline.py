@@ -0,0 +1,55 @@
+"""Разбор скачанных страниц в пуле процессов, отдельно от загрузки.
+Загрузка (asyncio) только получает HTML и сразу освобождает место для следующего запроса,
+разбор таблиц идет параллельно на всех ядрах, а результат в накопитель записывает
+один поток - цикл asyncio, поэтому блокировки не нужны"""
+import os  # Для числа ядер
+import asyncio  # Для ожидания результата из пула
+from concurrent.futures import ProcessPoolExecutor  # Пул процессов для разбора
+
+import numpy as np  # Для дат в виде массива
+
+from weather_extract import extract_table
+
+
+def default_parse_workers():
+    """Процессов разбора по умолчанию: все ядра, кроме одного (он остается загрузке и записи)"""
+    return max(1, (os.cpu_count() or 1) - 1)
+
+
+def extract_page(html, engine="fast"):
+    """extract_table для процесса пула. Даты отдаются номерами дней (int32):
+    массив передается между процессами намного быстрее списка объектов date"""
+    columns = extract_table(html, engine)
+    if columns is None:
+        return None
+    dates = columns["Дата"]
+    columns["Дата"] = np.fromiter((day.toordinal() for day in dates), dtype=np.int32, count=len(dates))
+    return columns
+
+
+class ParsePool:
+    """Этап разбора страниц.
+    workers=0 - разбор в текущем процессе (как раньше), иначе - в пуле из workers процессов"""
+
+    def __init__(self, workers=0, engine="fast"):
+        self.workers = workers
+        self.engine = engine
+        self.executor = ProcessPoolExecutor(workers) if workers else None
+
+    async def extract(self, html):
+        """Колонки таблицы страницы (или None, если таблицы нет)"""
+        if self.executor is None:
+            return extract_table(html, self.engine)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, extract_page, html, self.engine)
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,42 @@
+"""Бинарный снимок таблиц, посчитанных по файлу с погодой.
+Разбор большого CSV и группировки выполняются один раз; в следующие запуски таблицы
+читаются из снимка (pickle) за миллисекунды. Снимок пересчитывается, только если у исходного
+файла изменились размер или время изменения (или версия формата снимка)"""
+import os  # Для размера и времени изменения файла
+import pickle  # Для сохранения таблиц в бинарном виде
+
+SNAPSHOT_VERSION = 2  # Увеличить, если меняется состав сохраняемых таблиц
+
+
+def source_key(source, settings=()):
+    """Отпечаток исходного файла: путь, размер и время изменения,
+    плюс настройки расчета (при их изменении снимок тоже пересчитывается)"""
+    stat = os.stat(source)
+    return (SNAPSHOT_VERSION, os.path.abspath(source), stat.st_size, stat.st_mtime_ns, tuple(settings))
+
+
+def load_or_build(source, snapshot_file, build, settings=()):
+    """Возвращает таблицы из снимка, если он сделан с того же исходного файла
+    и с теми же настройками settings, иначе вызывает build(source) и сохраняет
+    результат в снимок"""
+    key = source_key(source, settings)
+    if os.path.exists(snapshot_file):
+        try:
+            with open(snapshot_file, "rb") as f:
+                snapshot = pickle.load(f)
+            if snapshot["key"] == key:
+                return snapshot["data"]
+        except Exception:
+            pass  # битый или старый снимок - просто пересчитываем
+
+    data = build(source)
+
+    # Пишем во временный файл и переименовываем, чтобы не оставить битый снимок
+    tmp_file = f"{snapshot_file}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_file, "wb") as f:
+            pickle.dump({"key": key, "data": data}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file, snapshot_file)
+    except OSError:
+        pass  # нет прав на запись - работаем без снимка
+    return data
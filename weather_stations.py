@@ -0,0 +1,179 @@
+"""Каталог станций и планирование обновления.
+Станции перечислены в файле stations.csv (Город, Станция, Начало, Конец).
+Каталог делится на части (шарды) по коду станции, чтобы несколько процессов или машин
+обновляли каждая свою часть. Для каждой станции запоминается, когда она обновлялась
+и до какого дня есть данные (watermark); каждый шард пишет отметки в свой файл,
+а читаются они из всех файлов сразу. Первыми обновляются самые давние станции,
+а ограничение числа станций за запуск держит время обновления постоянным при росте каталога"""
+import os  # Для работы с файлами
+import glob  # Для поиска файлов отметок всех шардов
+import json  # Для файла отметок обновления
+import zlib  # Для устойчивого разбиения по шардам
+from datetime import datetime  # Для даты обновления
+
+import pandas as pd  # Для чтения каталога
+
+from weather_gaps import merge_ranges
+
+CATALOG_FILE = "stations.csv"  # Каталог станций
+WATERMARKS_FILE = "weather_watermarks.json"  # Когда и до какого дня обновлялась каждая станция
+EMPTY_RANGES_FILE = "weather_empty_ranges.json"  # Дни, которых в архиве станции нет (проверено)
+
+
+def load_catalog(path=CATALOG_FILE):
+    """Читает каталог станций. Возвращает список заданий (город, код станции, начало, конец);
+    пустой конец периода - по сегодняшний день"""
+    catalog = pd.read_csv(path, dtype=str, keep_default_na=False)
+    today = datetime.now().strftime("%d.%m.%Y")
+    return [
+        (row.Город, row.Станция, row.Начало, row.Конец or today)
+        for row in catalog.itertuples(index=False)
+    ]
+
+
+def parse_shard(text):
+    """'2/4' -> (1, 4): номер шарда (с нуля) и число шардов"""
+    number, shards = (int(part) for part in text.split("/"))
+    if not 1 <= number <= shards:
+        raise ValueError(f"❌ Неверный шард {text}: номер должен быть от 1 до {shards}")
+    return number - 1, shards
+
+
+def shard_of(station_code, shards):
+    """Шард станции. crc32 одинаков во всех процессах и на всех машинах
+    (в отличие от встроенного hash), поэтому каждая станция всегда попадает в один шард"""
+    return zlib.crc32(str(station_code).encode("utf-8")) % shards
+
+
+def select_shard(jobs, shard, shards):
+    """Задания своего шарда"""
+    return [job for job in jobs if shard_of(job[1], shards) == shard]
+
+
+def shard_path(path, shard, shards):
+    """Отдельный файл для шарда: weather.csv -> weather.shard2of4.csv (один шард - без изменений)"""
+    if shards == 1:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.shard{shard + 1}of{shards}{ext}"
+
+
+def shard_files(path):
+    """Файлы всех шардов для path (weather.csv -> weather.shard1of4.csv ...), по имени"""
+    root, ext = os.path.splitext(path)
+    return sorted(glob.glob(f"{glob.escape(root)}.shard*of*{ext}"))
+
+
+def _read_watermarks(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_watermarks(path=WATERMARKS_FILE):
+    """Отметки по кодам станций из общего файла и файлов всех шардов
+    (weather_watermarks.shard2of4.json ...): {"fetched": время обновления,
+    "last_day": последний день данных (ГГГГ-ММ-ДД)}. Если станция есть в нескольких
+    файлах (число шардов менялось), берется самая свежая отметка"""
+    watermarks = {}
+    for file in [path] + shard_files(path):
+        for station, mark in _read_watermarks(file).items():
+            if mark.get("fetched", "") >= watermarks.get(station, {}).get("fetched", ""):
+                watermarks[station] = mark
+    return watermarks
+
+
+def save_watermarks(updates, path=WATERMARKS_FILE):
+    """Дописывает новые отметки в файл своего шарда (см. shard_path). В файл пишет только
+    один процесс, поэтому шарды не затирают отметки друг друга без всяких блокировок;
+    запись - через временный файл"""
+    watermarks = _read_watermarks(path)
+    watermarks.update(updates)
+    tmp_file = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(watermarks, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(tmp_file, path)
+
+
+def load_empty_ranges(path=EMPTY_RANGES_FILE):
+    """Проверенные пустые диапазоны дат по кодам станций из общего файла и файлов
+    всех шардов: {станция: [(первый день, последний день)]} (номера дней,
+    date.toordinal()), без пересечений"""
+    ranges = {}
+    for file in [path] + shard_files(path):
+        for station, pairs in _read_watermarks(file).items():
+            ranges.setdefault(station, []).extend(
+                (datetime.strptime(start, "%Y-%m-%d").toordinal(),
+                 datetime.strptime(end, "%Y-%m-%d").toordinal())
+                for start, end in pairs
+            )
+    return {station: merge_ranges(pairs) for station, pairs in ranges.items()}
+
+
+def save_empty_ranges(updates, path=EMPTY_RANGES_FILE):
+    """Добавляет пустые диапазоны станций ({станция: [(начало, конец)]}, номера дней)
+    в файл своего шарда - как save_watermarks"""
+    stored = _read_watermarks(path)
+    for station, pairs in updates.items():
+        known = [
+            (datetime.strptime(start, "%Y-%m-%d").toordinal(),
+             datetime.strptime(end, "%Y-%m-%d").toordinal())
+            for start, end in stored.get(station, [])
+        ]
+        stored[station] = [
+            [datetime.fromordinal(start).strftime("%Y-%m-%d"),
+             datetime.fromordinal(end).strftime("%Y-%m-%d")]
+            for start, end in merge_ranges(known + list(pairs))
+        ]
+    tmp_file = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(stored, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(tmp_file, path)
+
+
+def stalest_first(jobs, watermarks, limit=None):
+    """Сортирует задания: сначала станции, которые еще не обновлялись, затем - обновлявшиеся
+    давнее всего; при одинаковом времени обновления (один запуск) - с более старым
+    последним днем данных. limit - сколько станций взять в этот запуск (None - все)"""
+    def staleness(job):
+        mark = watermarks.get(job[1], {})
+        return mark.get("fetched", ""), mark.get("last_day") or ""
+
+    ordered = sorted(jobs, key=staleness)
+    return ordered if limit is None else ordered[:limit]
+
+
+def schedule(catalog_file=CATALOG_FILE, shard=None, watermarks_file=WATERMARKS_FILE, limit=None):
+    """Задания на этот запуск: каталог -> свой шард -> самые давние станции первыми.
+    shard - строка вида '2/4' (None - весь каталог)"""
+    jobs = load_catalog(catalog_file)
+    if shard:
+        number, shards = parse_shard(shard)
+        jobs = select_shard(jobs, number, shards)
+    return stalest_first(jobs, load_watermarks(watermarks_file), limit)
+
+
+def fetched_watermarks(parser, jobs):
+    """Новые отметки для станций, у которых все задания завершились успешно
+    (любая неудача - ошибка сети, нет в кэше, нет таблицы - попадает в parser.failed_jobs):
+    время обновления и последний день, который есть в данных"""
+    failed = {job[1] for job in parser.failed_jobs}
+    columns = parser.daily_data.columns()
+    last_days = pd.Series(columns["ordinal"]).groupby(columns["city"]).max()
+    city_codes = {name: code for code, name in enumerate(parser.daily_data.city_names)}
+    fetched = datetime.now().isoformat(timespec="seconds")
+
+    updates = {}
+    for city_name, station_code, _, _ in jobs:
+        if station_code in failed:
+            continue  # останется давней и будет первой в следующий раз
+        last_day = last_days.get(city_codes.get(city_name))
+        updates[station_code] = {
+            "city": city_name,
+            "fetched": fetched,
+            "last_day": None
+            if last_day is None
+            else datetime.fromordinal(int(last_day)).strftime("%Y-%m-%d"),
+        }
+    return updates
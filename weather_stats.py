@@ -0,0 +1,41 @@
+"""Статистика по станциям за один проход groupby.
+Общая для сохранения файла и сводного отчета: строки, пропуски по каждой колонке,
+период и полнота данных по каждому городу"""
+import os  # Для определения формата отчета по расширению
+import json  # Для отчета в JSON
+
+import pandas as pd  # Для группировки
+
+from weather_extract import VALUE_COLUMNS
+
+
+def station_statistics(df):
+    """Таблица по городам: Дней, Начало, Конец, Пропусков_<колонка> для каждого
+    метеопараметра и Полнота_температуры_% (доля дней со средней температурой)"""
+    cities = df["Город"]
+    stats = df.groupby(cities, observed=True, sort=True)["Дата"].agg(["size", "min", "max"])
+    stats.columns = ["Дней", "Начало", "Конец"]
+
+    # Пропуски по всем колонкам сразу: одна группировка булевой таблицы
+    nulls = df[VALUE_COLUMNS].isna().groupby(cities, observed=True, sort=True).sum()
+    stats = stats.join(nulls.add_prefix("Пропусков_"))
+
+    stats["Полнота_температуры_%"] = (
+        100 * (stats["Дней"] - stats["Пропусков_Сред_температура"]) / stats["Дней"]
+    ).round(1)
+    stats.index.name = "Город"
+    return stats.reset_index()
+
+
+def write_stats_report(stats, path):
+    """Сохраняет статистику в машиночитаемом виде: .json (список записей) или .csv"""
+    report = stats.copy()
+    for column in ("Начало", "Конец"):
+        report[column] = pd.to_datetime(report[column]).dt.strftime("%Y-%m-%d")
+    report["Город"] = report["Город"].astype(str)
+
+    if os.path.splitext(path)[1].lower() == ".json":
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report.to_dict("records"), f, ensure_ascii=False, indent=2)
+    else:
+        report.to_csv(path, index=False, encoding="utf-8")
@@ -0,0 +1,120 @@
+"""Хранение ежедневных погодных данных в бинарном колоночном формате.
+Набор данных - папка, разбитая на части по городу и году (Город=Сочи/Год=2024/...),
+в формате Parquet или Arrow IPC. Пропуски хранятся как настоящие null, у колонок строгие типы,
+а читать можно только нужные города, годы и колонки"""
+import os  # Для работы с папками
+
+import pandas as pd  # Для работы с табличными данными
+
+try:
+    import pyarrow as pa  # Колоночные таблицы Arrow
+    import pyarrow.dataset as ds  # Разбитые на части наборы данных
+except ImportError:  # pyarrow нужен только для бинарного формата
+    pa = None
+    ds = None
+
+from weather_extract import VALUE_COLUMNS
+
+# Форматы: имя для пользователя -> формат pyarrow.dataset
+FORMATS = {"parquet": "parquet", "arrow": "ipc"}
+
+DAILY_CSV = "weather_daily_all_cities.csv"  # Файл, который создает 1parserweather.py
+
+# Типы колонок ежедневного файла: город - категория, числа - самые компактные подходящие
+DAILY_DTYPES = {
+    "Город": "category",
+    "Год": "int16",
+    "Месяц": "int8",
+    "День": "int8",
+    **{name: "float32" for name in VALUE_COLUMNS},
+}
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("❌ Для Parquet/Arrow нужен pyarrow: pip install pyarrow")
+
+
+def weather_schema():
+    """Типизированная схема набора данных"""
+    _require_pyarrow()
+    return pa.schema(
+        [("Город", pa.string()), ("Дата", pa.date32()), ("Год", pa.int16()),
+         ("Месяц", pa.int8()), ("День", pa.int8())]
+        + [(name, pa.float32()) for name in VALUE_COLUMNS]
+    )
+
+
+def _partitioning():
+    return ds.partitioning(
+        pa.schema([("Город", pa.string()), ("Год", pa.int16())]), flavor="hive"
+    )
+
+
+def save_partitioned(df, root_dir, fmt="parquet"):
+    """Сохраняет таблицу в папку root_dir, разбивая по городу и году.
+    Части, которые есть в df, перезаписываются, остальные остаются как были"""
+    _require_pyarrow()
+    table = pa.Table.from_pandas(
+        df.astype({"Город": str}), schema=weather_schema(), preserve_index=False
+    )
+    ds.write_dataset(
+        table,
+        root_dir,
+        format=FORMATS[fmt],
+        partitioning=_partitioning(),
+        existing_data_behavior="delete_matching",
+        basename_template="part-{i}." + ("parquet" if fmt == "parquet" else "arrow"),
+    )
+
+
+def dataset_size(root_dir):
+    """Суммарный размер файлов набора данных в байтах"""
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, files in os.walk(root_dir)
+        for name in files
+    )
+
+
+def load_partitioned(root_dir, cities=None, years=None, columns=None, fmt="parquet"):
+    """Читает набор данных. cities / years ограничивают читаемые части (остальные файлы
+    даже не открываются), columns - список нужных колонок (None - все)"""
+    _require_pyarrow()
+    dataset = ds.dataset(root_dir, format=FORMATS[fmt], partitioning=_partitioning())
+
+    condition = None
+    if cities is not None:
+        condition = ds.field("Город").isin(list(cities))
+    if years is not None:
+        year_condition = ds.field("Год").isin([int(year) for year in years])
+        condition = year_condition if condition is None else condition & year_condition
+
+    table = dataset.to_table(columns=columns, filter=condition)
+    df = table.to_pandas()
+    # Колонки разбиения (Город, Год) pyarrow добавляет в конец - возвращаем порядок схемы
+    df = df[[name for name in weather_schema().names if name in df.columns]]
+    if "Город" in df.columns:
+        df["Город"] = df["Город"].astype("category")
+    if "Дата" in df.columns:
+        df["Дата"] = pd.to_datetime(df["Дата"])
+    return df
+
+
+def load_daily(path=DAILY_CSV, columns=None, fmt="csv"):
+    """Читает ежедневные данные с заранее заданными типами: "None" - пропуск (NaN),
+    Город - категория, метеопараметры - float32, Год/Месяц/День - int16/int8.
+    columns - только нужные колонки (остальные не разбираются и не занимают память).
+    fmt - csv или parquet / arrow (тогда path - папка набора данных)"""
+    if fmt != "csv":
+        return load_partitioned(path, columns=columns, fmt=fmt)
+
+    df = pd.read_csv(
+        path,
+        usecols=columns,
+        dtype={name: dtype for name, dtype in DAILY_DTYPES.items() if columns is None or name in columns},
+        na_values=["None"],
+    )
+    if "Дата" in df.columns:
+        df["Дата"] = pd.to_datetime(df["Дата"], format="%Y-%m-%d")
+    return df
@@ -0,0 +1,204 @@
+"""Генератор искусственных ежедневных погодных данных для нагрузочных проверок.
+N станций за M лет: сезонный ход температуры со своей нормой и амплитудой у каждой станции,
+шум с "памятью" (теплые и холодные периоды по несколько дней), давление, ветер, осадки
+и управляемая доля пропусков. Данные пишутся частями по группам станций, поэтому
+набор в сотни миллионов строк не требует держать его в памяти целиком.
+
+Запуск:
+    python weather_synth.py --stations 1000 --years 10
+    python weather_synth.py --stations 20000 --years 15 --format parquet --output synth_parquet
+"""
+import time  # Для замера времени
+import argparse  # Для параметров командной строки
+from datetime import date  # Для границ периода
+
+import numpy as np  # Для векторной генерации значений
+import pandas as pd  # Для записи частей
+
+try:
+    import pyarrow as pa  # Быстрая запись CSV (в разы быстрее pandas.to_csv)
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+except ImportError:  # без pyarrow CSV пишется через pandas
+    pa = None
+
+from weather_columns import EPOCH_ORDINAL
+from weather_extract import VALUE_COLUMNS
+from weather_store import FORMATS, save_partitioned
+
+CHUNK_ROWS = 2_000_000  # Примерный размер одной записываемой части
+
+
+def station_names(stations):
+    """Названия станций: Станция 00001, Станция 00002, ..."""
+    width = max(5, len(str(stations)))
+    return [f"Станция {i + 1:0{width}d}" for i in range(stations)]
+
+
+def _smooth_noise(rng, shape, persistence=0.7):
+    """Шум с памятью (AR(1) по дням): погода меняется не скачками, а периодами.
+    Вычисляется сверткой с затухающим ядром (15 сдвигов всего массива), без цикла по дням"""
+    white = rng.standard_normal(shape)
+    weight = np.sqrt(1 - persistence**2)  # чтобы дисперсия осталась около 1
+    smooth = weight * white
+    for lag in range(1, 15):
+        smooth[:, lag:] += weight * persistence**lag * white[:, :-lag]
+    return smooth
+
+
+def generate_chunk(names, first_station, days, missing_rate=0.02, absent_rate=0.0, seed=0):
+    """Данные для группы станций за дни days (номера date.toordinal()).
+    missing_rate - доля дней, когда станция не передала значения (строка есть, значения None),
+    absent_rate - доля дней, которых в данных нет совсем (для проверки поиска пропусков).
+    Возвращает таблицу в формате ColumnarWeatherBuffer.to_dataframe()"""
+    count = len(names)
+    rng = np.random.default_rng((seed, first_station))
+    shape = (count, len(days))
+
+    # Норма и сезонный ход у каждой станции свои: от теплого юга до холодного севера
+    base = rng.uniform(-10, 18, size=(count, 1))
+    amplitude = rng.uniform(4, 20, size=(count, 1))
+    coldest_day = rng.uniform(10, 35, size=(count, 1))  # день года с самой низкой температурой
+    day_of_year = (days - date(2000, 1, 1).toordinal()) % 365.25
+    seasonal = base - amplitude * np.cos(2 * np.pi * (day_of_year - coldest_day) / 365.25)
+
+    avg = seasonal + 3 * _smooth_noise(rng, shape)
+    spread = rng.uniform(2, 6, size=shape)
+    pressure = 1013 + 8 * _smooth_noise(rng, shape, persistence=0.8)
+    wind = np.abs(rng.normal(3, 2, size=shape))
+    # Осадки: примерно треть дней с дождем, количество - экспоненциальное
+    rain = np.where(rng.random(shape) < 0.33, rng.exponential(4, size=shape), 0.0)
+
+    values = {
+        "Макс_температура": avg + spread / 2,
+        "Мин_температура": avg - spread / 2,
+        "Сред_температура": avg,
+        "Давление_гПа": pressure,
+        "Скорость_ветра_мс": wind,
+        "Осадки_мм": rain,
+    }
+    missing = rng.random(shape) < missing_rate
+    keep = (rng.random(shape) >= absent_rate).ravel()
+
+    ordinal = np.broadcast_to(days, shape).ravel()[keep]
+    dates = pd.DatetimeIndex((ordinal - EPOCH_ORDINAL).astype("datetime64[D]"))
+    data = {
+        "Город": pd.Categorical.from_codes(
+            np.repeat(np.arange(count, dtype=np.int32), len(days))[keep], categories=names
+        ),
+        "Дата": dates,
+        "Год": dates.year.astype(np.int16),
+        "Месяц": dates.month.astype(np.int8),
+        "День": dates.day.astype(np.int8),
+    }
+    for name in VALUE_COLUMNS:
+        column = np.round(values[name], 1).astype(np.float32)  # как на сайте - один знак
+        column[missing] = np.nan
+        data[name] = column.ravel()[keep]
+    return pd.DataFrame(data, copy=False)
+
+
+def append_csv(chunk, f, header):
+    """Дописывает часть в открытый CSV-файл (бинарный режим) в формате save_daily_to_csv:
+    даты ГГГГ-ММ-ДД, пропуски - None"""
+    if pa is None:
+        chunk.to_csv(
+            f, header=header, index=False, encoding="utf-8", na_rep="None",
+            float_format="%.1f", date_format="%Y-%m-%d",
+        )
+        return
+
+    columns = {
+        "Город": pa.DictionaryArray.from_arrays(
+            chunk["Город"].cat.codes.to_numpy(), chunk["Город"].cat.categories.tolist()
+        ),
+        "Дата": pa.array(chunk["Дата"].to_numpy().astype("datetime64[D]")),
+    }
+    for name in ("Год", "Месяц", "День"):
+        columns[name] = pa.array(chunk[name].to_numpy())
+    for name in VALUE_COLUMNS:
+        # float64 после округления печатается коротко: -4.7, а не -4.699999809
+        values = pa.array(np.round(chunk[name].to_numpy(np.float64), 1), from_pandas=True)
+        columns[name] = pc.fill_null(pc.cast(values, pa.string()), "None")
+
+    if header:
+        f.write((",".join(chunk.columns) + "\n").encode("utf-8"))
+    pa_csv.write_csv(
+        pa.table(columns), f, pa_csv.WriteOptions(include_header=False, quoting_style="none")
+    )
+
+
+def generate_dataset(
+    output,
+    stations=100,
+    years=5,
+    start_year=2020,
+    fmt="csv",
+    missing_rate=0.02,
+    absent_rate=0.0,
+    chunk_rows=CHUNK_ROWS,
+    seed=0,
+):
+    """Создает набор данных и возвращает число строк.
+    fmt: csv (один файл, в формате weather_daily_all_cities.csv) или parquet / arrow
+    (папка, разбитая по городу и году, как в weather_store)"""
+    days = np.arange(date(start_year, 1, 1).toordinal(), date(start_year + years, 1, 1).toordinal())
+    names = station_names(stations)
+    per_chunk = max(1, chunk_rows // len(days))  # сколько станций в одной части
+
+    csv_file = open(output, "wb") if fmt == "csv" else None
+    total = 0
+    try:
+        for first in range(0, stations, per_chunk):
+            chunk = generate_chunk(
+                names[first : first + per_chunk], first, days, missing_rate, absent_rate, seed
+            )
+            if csv_file is not None:
+                append_csv(chunk, csv_file, header=(first == 0))
+            else:
+                save_partitioned(chunk, output, fmt)
+            total += len(chunk)
+            print(f"  записано станций: {min(first + per_chunk, stations)}/{stations}, строк: {total:,}")
+    finally:
+        if csv_file is not None:
+            csv_file.close()
+    return total
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Генератор искусственных погодных данных")
+    arg_parser.add_argument("--stations", type=int, default=100, help="число станций")
+    arg_parser.add_argument("--years", type=int, default=5, help="число лет")
+    arg_parser.add_argument("--start-year", type=int, default=2020, help="первый год")
+    arg_parser.add_argument("--format", choices=["csv"] + list(FORMATS), default="csv")
+    arg_parser.add_argument("--output", help="файл (csv) или папка (parquet/arrow)")
+    arg_parser.add_argument("--missing-rate", type=float, default=0.02, help="доля дней без значений")
+    arg_parser.add_argument("--absent-rate", type=float, default=0.0, help="доля отсутствующих дней")
+    arg_parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS, help="строк в одной части")
+    arg_parser.add_argument("--seed", type=int, default=0, help="зерно генератора")
+    args = arg_parser.parse_args()
+
+    output = args.output or (
+        "weather_daily_synthetic.csv" if args.format == "csv" else f"weather_synthetic_{args.format}"
+    )
+    print("=" * 70)
+    print(f"🧪 Генерация: {args.stations} станций × {args.years} лет -> {output}")
+    print("=" * 70)
+    started = time.perf_counter()
+    total = generate_dataset(
+        output,
+        args.stations,
+        args.years,
+        args.start_year,
+        args.format,
+        args.missing_rate,
+        args.absent_rate,
+        args.chunk_rows,
+        args.seed,
+    )
+    elapsed = time.perf_counter() - started
+    print(f"✅ Готово: {total:,} строк за {elapsed:.1f} с ({total / elapsed:,.0f} строк/с)")
+
+
+if __name__ == "__main__":
+    main()